@@ -2,34 +2,171 @@
 """
 Менеджер кэша на asyncio + httpx.
 Загрузка картинок через create_task — без QThread, без конфликтов.
+Очередь загрузок, лимиты и отмену ведёт DownloadScheduler.
+На каждый URL — не больше одной загрузки (single-flight): все вызывающие
+(get_image, request_download, префетч) ждут одну и ту же future.
 После загрузки эмитит image_ready(url) через маленький QObject-сигналлер.
+
+Уровни:
+  варианты — уже отмасштабированные копии под (url, размер, DPR) в LRU
+             с бюджетом в байтах; декодируются и масштабируются в пуле
+             потоков (ImageDecoder)
+  диск     — md5(url).jpg в cache_dir или pack-сегменты (disk_backend="pack"),
+             переживают перезапуск (см. DiskCache)
+Отдельного уровня полноразмерных QPixmap нет: карточки рисуют только
+варианты, а на диск ходим при промахе по ним — и то в пуле декодера.
+Протухшие файлы отдаются сразу, а в фоне перепроверяются условным GET
+(If-None-Match / If-Modified-Since); 304 обновляет только метаданные.
+Неудачные URL попадают в негативный кэш с бэкоффом (404 — навсегда),
+а для превью есть цепочка замен maxres → sd → hq → mqdefault → заглушка.
 """
-import os
-import shutil
-import hashlib
+import re
+import time
 import asyncio
+from collections import OrderedDict
+from urllib.parse import urlsplit
 
 import httpx
-from PyQt5.QtCore import QObject, pyqtSignal
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import QObject, QSize, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage
+
+from core.disk_cache import DiskCache
+from core.cache_metrics import CacheMetrics
+from core.image_decoder import ImageDecoder, load_from_data
+from core.download_scheduler import (DownloadScheduler, PRIORITY_URGENT,
+                                     PRIORITY_VISIBLE, PRIORITY_BACKGROUND)
 
 
 class _Signaller(QObject):
     image_ready = pyqtSignal(str)   # url
 
 
+class _PixmapLRU:
+    """
+    LRU декодированных картинок с ограничением по байтам.
+    Стоимость записи — реальный размер пиксельного буфера (w * h * depth / 8).
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._items: OrderedDict = OrderedDict()   # key -> (QPixmap, cost)
+
+    @staticmethod
+    def _cost(px: QPixmap) -> int:
+        return px.width() * px.height() * max(px.depth(), 8) // 8
+
+    def get(self, key) -> QPixmap | None:
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, px: QPixmap):
+        cost = self._cost(px)
+        if cost > self.budget_bytes:
+            return   # одна картинка больше всего бюджета — не кэшируем
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        self._items[key] = (px, cost)
+        self.total_bytes += cost
+        self._evict()
+
+    def discard(self, key):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def clear(self):
+        self._items.clear()
+        self.total_bytes = 0
+
+    def _evict(self):
+        while self.total_bytes > self.budget_bytes and self._items:
+            _, (_, cost) = self._items.popitem(last=False)
+            self.total_bytes -= cost
+            self.evictions += 1
+            self.evicted_bytes += cost
+
+    def stats(self) -> dict:
+        return {
+            "entries":       len(self._items),
+            "bytes":         self.total_bytes,
+            "budget":        self.budget_bytes,
+            "hits":          self.hits,
+            "misses":        self.misses,
+            "evictions":     self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+    def keys(self) -> list:
+        return list(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+
 class CacheManager:
-    def __init__(self, cache_dir: str = "cache"):
+    # Бэкофф для временных ошибок (429 / 5xx / таймауты / 403): 5с, 10с, 20с … 30 мин
+    BACKOFF_BASE = 5.0
+    BACKOFF_MAX = 30 * 60.0
+    PERMANENT_STATUSES = (404, 410)
+    # Превью ~30 КБ, аватарки до ~200 КБ — всё, что больше, подозрительно
+    MAX_IMAGE_BYTES = 5 * 1024 * 1024
+    DOWNLOAD_CHUNK = 64 * 1024
+
+    # Карточка 304x180 при DPR 2 ≈ 440 КБ — 32 МБ хватает на ~70 экранов
+    DEFAULT_VARIANT_BUDGET = 32 * 1024 * 1024
+    # Превью ~20-40 КБ — 512 МБ это десятки тысяч картинок
+    DEFAULT_DISK_BUDGET = 512 * 1024 * 1024
+
+    def __init__(self, cache_dir: str = "cache",
+                 variant_budget: int = DEFAULT_VARIANT_BUDGET,
+                 disk_budget: int = DEFAULT_DISK_BUDGET,
+                 disk_ttl: float | None = None,
+                 disk_policy: str = "lru",
+                 disk_backend: str = "files",
+                 max_downloads: int = 6,
+                 max_downloads_per_host: int = 4,
+                 decode_threads: int = 2):
         self.cache_dir = cache_dir
-        if os.path.exists(self.cache_dir):
-            shutil.rmtree(self.cache_dir)
-        os.makedirs(self.cache_dir)
+        self.disk = DiskCache(cache_dir, max_bytes=disk_budget,
+                              ttl=disk_ttl, policy=disk_policy,
+                              backend=disk_backend)
+        # Вытеснение — в фоне и с задержкой, чтобы не мешать первому экрану
+        self.disk.start_maintenance(delay=5.0)
 
         self._signaller = _Signaller()
         self.image_ready = self._signaller.image_ready   # пробрасываем наружу
 
         self._client: httpx.AsyncClient | None = None
-        self._pending: set[str] = set()   # URL которые сейчас качаются
+        # URL -> future загрузки (стоит в очереди или качается)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._revalidating: set[str] = set()
+        self.scheduler = DownloadScheduler(max_downloads, max_downloads_per_host)
+        self._revalidated: set[str] = set()   # уже проверенные за эту сессию
+        # Негативный кэш: url -> (retry_at по time.monotonic, попыток, статус)
+        self._failures: dict[str, tuple[float, int, int | None]] = {}
+        self._aliases: dict[str, set[str]] = {}   # замена -> исходные URL
+        self._variants = _PixmapLRU(variant_budget)   # (url, w, h, dpr) -> QPixmap
+        self.decoder = ImageDecoder(decode_threads)
+        self.decoder.decoded.connect(self._on_decoded)
+        self.metrics = CacheMetrics()
 
     # ── httpx клиент (ленивая инициализация) ─────────────────────────────────
 
@@ -42,38 +179,274 @@ class CacheManager:
             )
         return self._client
 
-    # ── Путь к файлу кэша ────────────────────────────────────────────────────
+    # ── Полная картинка, синхронно (декодирует в текущем потоке) ─────────────
 
-    def _path(self, url: str) -> str:
-        h = hashlib.md5(url.encode()).hexdigest()
-        return os.path.join(self.cache_dir, h + ".jpg")
+    def get_image_sync(self, url: str) -> QPixmap | None:
+        """
+        Возвращает QPixmap если картинка уже есть на диске, иначе None.
+        Декодирует каждый раз — для отрисовки есть get_scaled_sync().
+        """
+        if not url:
+            return None
+        data = self.disk.read(url)
+        if data is None:
+            self.metrics.incr("disk_misses")
+            return None
+        self.metrics.incr("disk_hits")
+        px = QPixmap()
+        load_from_data(px, data)
+        del data
+        if px.isNull():
+            self._drop_corrupt(url)
+            return None
+        self.disk.touch(url)
+        self._maybe_revalidate(url)
+        return px
 
-    # ── Синхронная проверка (вызывается из paint()) ───────────────────────────
+    # ── Отмасштабированные варианты (вызывается из paint()) ──────────────────
 
-    def get_image_sync(self, url: str) -> QPixmap | None:
-        """Возвращает QPixmap если файл уже есть в кэше, иначе None."""
+    @staticmethod
+    def _variant_key(url: str, size: QSize, dpr: float) -> tuple:
+        return (url, size.width(), size.height(), round(dpr, 2))
+
+    def get_scaled_sync(self, url: str, size: QSize,
+                        dpr: float = 1.0) -> QPixmap | None:
+        """
+        Возвращает картинку, уже отмасштабированную и обрезанную по центру
+        под size (в логических пикселях) с учётом devicePixelRatio.
+        Масштабирование делается один раз на (url, size, dpr) — дальше это blit.
+
+        При промахе ничего не декодирует в GUI-потоке: если файл есть на
+        диске, ставит его в пул декодера и возвращает None. Когда вариант
+        готов, придёт image_ready(url).
+        """
+        if not url or size.isEmpty():
+            return None
+        url = self.resolve_url(url)
         if not url:
             return None
-        path = self._path(url)
-        if os.path.exists(path):
-            px = QPixmap(path)
-            return px if not px.isNull() else None
+        key = self._variant_key(url, size, dpr)
+        px = self._variants.get(key)
+        if px is not None:
+            return px
+        if self.decoder.is_pending(key):
+            return None
+        if not self.disk.has(url):
+            self.metrics.incr("disk_misses")
+            return None
+        self.metrics.incr("disk_hits")
+        self.metrics.incr("decodes_submitted")
+        self.decoder.submit(key, lambda: self.disk.read(url), size, dpr)
+        self.disk.touch(url)
+        self._maybe_revalidate(url)
         return None
 
+    def _on_decoded(self, key: tuple, img: QImage):
+        """Готовый вариант из пула декодера (уже в GUI-потоке)."""
+        if img.isNull():
+            self.metrics.incr("decode_errors")
+            print(f"[Cache] ✗ не удалось декодировать {key[0][-50:]}")
+            self._drop_corrupt(key[0])
+            return
+        self._variants.put(key, QPixmap.fromImage(img))
+        self._emit_ready(key[0])
+
+    def _drop_corrupt(self, url: str):
+        """
+        Битый файл убираем с диска, а URL — в негативный кэш: иначе каждая
+        перерисовка снова читала бы и декодировала его. После бэкоффа
+        картинка скачается заново.
+        """
+        self.disk.discard(url)
+        self._record_failure(url, None)
+
+    def _emit_ready(self, url: str):
+        """image_ready для url и для всех URL, которые на него заменены."""
+        self._signaller.image_ready.emit(url)
+        for original in self._aliases.get(url, ()):
+            self._signaller.image_ready.emit(original)
+
+    def invalidate_variants(self, size: QSize | None = None):
+        """
+        Сбрасывает отмасштабированные копии.
+        size=None — все, иначе только для этого размера карточки
+        (вызывается при смене геометрии карточек).
+        """
+        if size is None:
+            self._variants.clear()
+            return
+        w, h = size.width(), size.height()
+        for key in [k for k in self._variants.keys() if k[1] == w and k[2] == h]:
+            self._variants.discard(key)
+
+    def _drop_variants_for(self, url: str):
+        for key in [k for k in self._variants.keys() if k[0] == url]:
+            self._variants.discard(key)
+
+    # ── Память ────────────────────────────────────────────────────────────────
+
+    def variant_stats(self) -> dict:
+        """Счётчики отмасштабированных вариантов: hits / misses / evictions / bytes."""
+        return self._variants.stats()
+
     # ── Запрос загрузки (вызывается из paint()) ───────────────────────────────
 
-    def request_download(self, url: str):
-        """Запускает asyncio-задачу если URL ещё не качается."""
-        if not url or url in self._pending:
+    def request_download(self, url: str, priority: int = PRIORITY_VISIBLE,
+                         pinned: bool = False):
+        """
+        Ставит URL в очередь планировщика, если его ещё нет в кэше.
+        Повторный вызов для уже стоящего в очереди URL поднимает приоритет.
+        URL в негативном кэше не качается до истечения бэкоффа.
+        pinned — картинка не из сетки (панель похожих): окно загрузок
+        сетки (set_download_window) её не отменяет.
+        """
+        url = self.resolve_url(url)
+        if not url or self.is_failed(url):
+            return
+        if url not in self._inflight and self.disk.has(url):
+            return
+        try:
+            self._fetch(url, priority, pinned)
+        except RuntimeError:
+            pass   # цикл ещё не запущен
+
+    def _fetch(self, url: str, priority: int, pinned: bool = False,
+               revalidate: bool = False) -> asyncio.Future:
+        """
+        Single-flight: возвращает общую future загрузки url, создавая её
+        только если загрузки ещё нет. Повторные вызовы лишь поднимают
+        приоритет в планировщике или закрепляют задачу от отмены.
+        """
+        fut = self._inflight.get(url)
+        if fut is None:
+            fut = asyncio.get_event_loop().create_future()
+            # Ошибку могут не забрать (paint не ждёт) — гасим предупреждение
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[url] = fut
+            if revalidate:
+                self._revalidating.add(url)
+        self.scheduler.submit(url, priority, lambda: self._download(url), pinned)
+        return fut
+
+    def set_download_window(self, wanted: dict[str, int]):
+        """
+        Окно загрузок от списка: url -> приоритет для видимых карточек
+        и рядов префетча. Всё, что в окно не попало, снимается или отменяется.
+        """
+        resolved: dict[str, int] = {}
+        for url, priority in wanted.items():
+            url = self.resolve_url(url)
+            if url:
+                resolved[url] = min(priority, resolved.get(url, priority))
+        for url in self.scheduler.retain(resolved):
+            # Снята из очереди или отменена на ходу (возможно, до первого шага
+            # _download — тогда его finally не сработает): завершаем future
+            # здесь, иначе request_download счёл бы URL вечно «в загрузке»
+            self._revalidating.discard(url)
+            fut = self._inflight.pop(url, None)
+            if fut is not None and not fut.done():
+                fut.cancel()
+
+    # ── Негативный кэш и замены ──────────────────────────────────────────────
+
+    def is_failed(self, url: str) -> bool:
+        """True пока URL в негативном кэше и бэкофф не истёк."""
+        entry = self._failures.get(url)
+        return entry is not None and time.monotonic() < entry[0]
+
+    def _record_failure(self, url: str, status: int | None,
+                        retry_after: float | None = None):
+        """404/410 — навсегда (до перезапуска), остальное — экспоненциально."""
+        _, attempts, _ = self._failures.get(url, (0.0, 0, None))
+        attempts += 1
+        if status in self.PERMANENT_STATUSES:
+            retry_at = float("inf")
+        else:
+            delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** (attempts - 1))
+            if retry_after:
+                delay = max(delay, retry_after)
+            retry_at = time.monotonic() + delay
+        self._failures[url] = (retry_at, attempts, status)
+        if retry_at == float("inf") and self._fallback_for(url):
+            # Сразу сообщаем, чтобы карточка перерисовалась уже с заменой
+            self._emit_ready(url)
+
+    # Цепочка замен превью: maxres → sd → hq → mq → заглушка
+    THUMB_FALLBACKS = {
+        "maxresdefault.jpg": "sddefault.jpg",
+        "sddefault.jpg":     "hqdefault.jpg",
+        "hqdefault.jpg":     "mqdefault.jpg",
+    }
+
+    @classmethod
+    def _fallback_for(cls, url: str) -> str:
+        """Следующее превью в цепочке замен; "" — дальше только заглушка."""
+        if "i.ytimg.com/vi/" not in url:
+            return ""
+        base, _, name = url.rpartition("/")
+        fallback = cls.THUMB_FALLBACKS.get(name)
+        return f"{base}/{fallback}" if fallback else ""
+
+    def resolve_url(self, url: str) -> str:
+        """
+        URL, который реально стоит показывать: если исходный окончательно
+        не найден (404), идём по цепочке замен. "" — рисовать заглушку.
+        """
+        while url:
+            entry = self._failures.get(url)
+            if entry is None or entry[0] != float("inf"):
+                return url
+            fallback = self._fallback_for(url)
+            if fallback:
+                self._aliases.setdefault(fallback, set()).add(url)
+            url = fallback
+        return ""
+
+    @staticmethod
+    def _retry_after(resp: httpx.Response) -> float | None:
+        try:
+            return float(resp.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
+
+    # ── Ревалидация ──────────────────────────────────────────────────────────
+
+    def _maybe_revalidate(self, url: str):
+        """Протухший файл отдаём как есть, а в фоне спрашиваем сервер."""
+        if url in self._revalidated or url in self._inflight:
             return
-        if os.path.exists(self._path(url)):
+        self._revalidated.add(url)
+        if not self.disk.is_stale(url):
             return
-        self._pending.add(url)
         try:
-            asyncio.create_task(self._download(url))
+            self._fetch(url, PRIORITY_BACKGROUND, pinned=True, revalidate=True)
         except RuntimeError:
-            # Цикл ещё не запущен — маловероятно, но на всякий случай
-            self._pending.discard(url)
+            pass
+
+    def _conditional_headers(self, url: str) -> dict:
+        v = self.disk.validators(url)
+        headers = {}
+        if "etag" in v:
+            headers["If-None-Match"] = v["etag"]
+        if "last_modified" in v:
+            headers["If-Modified-Since"] = v["last_modified"]
+        return headers
+
+    @staticmethod
+    def _max_age(resp: httpx.Response) -> float | None:
+        """Срок свежести из Cache-Control (no-cache/no-store → 0)."""
+        cc = resp.headers.get("Cache-Control", "").lower()
+        if "no-cache" in cc or "no-store" in cc:
+            return 0.0
+        m = re.search(r"max-age=(\d+)", cc)
+        return float(m.group(1)) if m else None
+
+    @staticmethod
+    def _default_max_age(url: str) -> float | None:
+        """Аватарки каналов меняются редко — держим их свежими неделю."""
+        if "googleusercontent.com" in url or "ggpht.com" in url:
+            return 7 * 24 * 3600.0
+        return None
 
     # ── Заголовки в зависимости от домена ────────────────────────────────────
 
@@ -95,36 +468,139 @@ class CacheManager:
     # ── Асинхронная загрузка ──────────────────────────────────────────────────
 
     async def _download(self, url: str):
-        path = self._path(url)
+        """Задача планировщика: качает url и завершает его общую future."""
+        fut = self._inflight.get(url)
+        revalidate = url in self._revalidating
         try:
-            client = self._get_client()
-            resp = await client.get(url, headers=self._headers_for(url))
-            resp.raise_for_status()
-            tmp = path + ".tmp"
-            with open(tmp, "wb") as f:
-                f.write(resp.content)
-            os.replace(tmp, path)
-            # Сигналим из главного потока — asyncio всегда в main thread
-            self._signaller.image_ready.emit(url)
+            await self._fetch_to_disk(url, revalidate)
+            if fut is not None and not fut.done():
+                fut.set_result(True)
+        except asyncio.CancelledError:
+            self.metrics.incr("downloads_cancelled")
+            if fut is not None and not fut.done():
+                fut.cancel()
+            raise
         except Exception as e:
-            print(f"[Cache] ✗ {url[-50:]}: {e}")
+            self.metrics.incr("downloads_failed")
+            if isinstance(e, httpx.HTTPStatusError):
+                status = e.response.status_code
+                self.metrics.incr(f"http_{status}")
+                print(f"[Cache] ✗ {url[-50:]}: HTTP {status}")
+                if not revalidate:
+                    self._record_failure(url, status, self._retry_after(e.response))
+            else:
+                print(f"[Cache] ✗ {url[-50:]}: {e}")
+                if not revalidate:
+                    self._record_failure(url, None)
+            if fut is not None and not fut.done():
+                fut.set_exception(e)
         finally:
-            self._pending.discard(url)
+            self._revalidating.discard(url)
+            if self._inflight.get(url) is fut:
+                del self._inflight[url]
+
+    async def _fetch_to_disk(self, url: str, revalidate: bool):
+        """Одна HTTP-загрузка в файл кэша. Ошибки пробрасываются наверх."""
+        headers = self._headers_for(url)
+        if revalidate:
+            headers.update(self._conditional_headers(url))
+        client = self._get_client()
+        started = time.monotonic()
+        async with client.stream("GET", url, headers=headers) as resp:
+            max_age = self._max_age(resp)
+            if max_age is None:
+                max_age = self._default_max_age(url)
+            if revalidate and resp.status_code == 304:
+                # Не изменилось — тело не качали, продлеваем свежесть
+                self.disk.mark_fresh(url, max_age)
+                self.metrics.incr("revalidated_304")
+                return
+            resp.raise_for_status()
+            body = await self._read_image_body(resp)
+        self.metrics.observe_download(urlsplit(url).hostname or "",
+                                      time.monotonic() - started, len(body))
+        self.metrics.incr("revalidated_200" if revalidate else "downloads_ok")
+        self.metrics.incr("bytes_downloaded", len(body))
+        # Запись — в executor'е, не блокирует цикл (а значит и UI)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.disk.write, url, body)
+        self.disk.record_write(url, len(body),
+                               etag=resp.headers.get("ETag"),
+                               last_modified=resp.headers.get("Last-Modified"),
+                               max_age=max_age)
+        self._drop_variants_for(url)   # на случай перезаписи — старые копии выбрасываем
+        self._failures.pop(url, None)
+        # Сигналим из главного потока — asyncio всегда в main thread
+        self._emit_ready(url)
+
+    async def _read_image_body(self, resp: httpx.Response) -> bytes:
+        """
+        Читает тело кусками, проверяя Content-Type и лимит размера —
+        HTML-страница ошибки или гигантский файл обрываются сразу.
+        """
+        ctype = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if ctype and not ctype.startswith("image/"):
+            raise ValueError(f"не картинка: {ctype}")
+        declared = resp.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.MAX_IMAGE_BYTES:
+            raise ValueError(f"слишком большой файл: {declared} байт")
+        buf = bytearray()
+        async for chunk in resp.aiter_bytes(self.DOWNLOAD_CHUNK):
+            buf += chunk
+            if len(buf) > self.MAX_IMAGE_BYTES:
+                raise ValueError(f"больше {self.MAX_IMAGE_BYTES} байт — обрываем")
+        return bytes(buf)
 
     # ── Async API (для совместимости с плагином) ──────────────────────────────
 
     async def get_image(self, url: str) -> QPixmap:
         """Скачивает если нет, возвращает QPixmap."""
+        url = self.resolve_url(url)
         if not url:
             return QPixmap()
-        path = self._path(url)
-        if not os.path.exists(path):
-            await self._download(url)
-        px = QPixmap(path)
-        return px if not px.isNull() else QPixmap()
+        px = self.get_image_sync(url)
+        if px is None and not self.is_failed(url):
+            try:
+                # shield — отмена вызывающего не должна отменять общую загрузку
+                await asyncio.shield(self._fetch(url, PRIORITY_URGENT, pinned=True))
+            except Exception:
+                pass   # уже залогировано в _download
+            px = self.get_image_sync(url)
+        return px if px is not None else QPixmap()
+
+    # ── Метрики ───────────────────────────────────────────────────────────────
+
+    def metrics_snapshot(self) -> dict:
+        """Сводка для отладочной панели и дампа в JSON."""
+        snap = self.metrics.snapshot()
+        snap["variants"] = self._variants.stats()
+        snap["disk"] = {
+            "bytes":         self.disk.total_bytes(),
+            "budget":        self.disk.max_bytes,
+            "evictions":     self.disk.evictions,
+            "evicted_bytes": self.disk.evicted_bytes,
+        }
+        snap["downloads"] = {
+            "queue_depth": self.scheduler.queue_depth,
+            "in_flight":   self.scheduler.in_flight,
+            "cancelled":   self.scheduler.cancelled,
+            "failing":     sum(1 for u in self._failures if self.is_failed(u)),
+        }
+        snap["decoder"] = {"queue_depth": self.decoder.queue_depth}
+        return snap
+
+    def dump_metrics(self, path: str = "cache_metrics.json"):
+        CacheMetrics.dump_json(self.metrics_snapshot(), path)
+        print(f"[Cache] Метрики сохранены в {path}")
 
     # ── Закрытие ──────────────────────────────────────────────────────────────
 
+    def flush(self):
+        """Синхронно сохраняет индекс диска (вызывается при закрытии окна)."""
+        self.disk.flush()
+
     async def close(self):
         if self._client and not self._client.is_closed:
-            await self._client.aclose()
\ No newline at end of file
+            await self._client.aclose()
+        self.decoder.shutdown()
+        self.disk.close()
\ No newline at end of file
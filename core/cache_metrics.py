@@ -0,0 +1,78 @@
+# core/cache_metrics.py
+"""
+Метрики кэша картинок: счётчики и гистограммы по хостам.
+
+Всё считается в главном потоке (asyncio + Qt), поэтому без блокировок.
+snapshot() отдаёт обычный dict — его показывает отладочная панель
+и его же можно сохранить в JSON для подбора бюджетов кэша.
+"""
+import json
+import time
+import bisect
+from collections import defaultdict
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (последняя — «+inf»)."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count":   self.count,
+            "avg":     round(self.total / self.count, 1) if self.count else 0,
+            "max":     round(self.max, 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class CacheMetrics:
+    LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+    SIZE_BUCKETS_KB = (4, 16, 32, 64, 128, 256, 1024)
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: dict[str, int] = defaultdict(int)
+        self._latency: dict[str, Histogram] = {}
+        self._size: dict[str, Histogram] = {}
+
+    def incr(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def observe_download(self, host: str, latency_s: float, size: int):
+        """Успешная загрузка: задержка (до конца тела) и размер по хосту."""
+        if host not in self._latency:
+            self._latency[host] = Histogram(self.LATENCY_BUCKETS_MS)
+            self._size[host] = Histogram(self.SIZE_BUCKETS_KB)
+        self._latency[host].observe(latency_s * 1000)
+        self._size[host].observe(size / 1024)
+
+    def snapshot(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "counters": dict(self.counters),
+            "hosts": {
+                host: {
+                    "latency_ms": self._latency[host].snapshot(),
+                    "size_kb":    self._size[host].snapshot(),
+                }
+                for host in sorted(self._latency)
+            },
+        }
+
+    @staticmethod
+    def dump_json(snapshot: dict, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
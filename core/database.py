@@ -1,6 +1,15 @@
+import json
+import time
 import sqlite3
 from typing import List, Tuple
 
+
+def _like_prefix(prefix: str) -> str:
+    """Шаблон LIKE «начинается с prefix» с экранированием % и _."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
 class Database:
     def __init__(self, db_path="local_data.db"):
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
@@ -37,6 +46,31 @@ class Database:
                 FOREIGN KEY(playlist_id) REFERENCES playlists(id)
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS query_cache (
+                plugin TEXT,
+                query TEXT,
+                page INTEGER,
+                results TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (plugin, query, page)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS channels (
+                channel_id TEXT PRIMARY KEY,
+                name TEXT,
+                avatar_url TEXT,
+                fetched_at REAL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS search_history (
+                query TEXT PRIMARY KEY,
+                uses INTEGER,
+                last_used REAL
+            )
+        """)
         self.conn.commit()
 
     def add_subscription(self, channel_id: str, name: str, avatar_url: str):
@@ -50,5 +84,87 @@ class Database:
         cursor.execute("SELECT * FROM subscriptions")
         return cursor.fetchall()
         
+    # ── Кэш результатов поиска ────────────────────────────────────────────────
+
+    def get_query_results(self, plugin: str, query: str, page: int = 0):
+        """(results, fetched_at) или None."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT results, fetched_at FROM query_cache "
+            "WHERE plugin = ? AND query = ? AND page = ?",
+            (plugin, query, page))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0]), row[1]
+        except json.JSONDecodeError:
+            return None
+
+    def put_query_results(self, plugin: str, query: str, page: int,
+                          results: list, fetched_at: float | None = None):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?, ?)",
+            (plugin, query, page, json.dumps(results, ensure_ascii=False),
+             fetched_at or time.time()))
+        self.conn.commit()
+
+    def cached_queries(self, plugin: str, prefix: str, limit: int = 8) -> List[str]:
+        """Запросы с закэшированной первой страницей, начинающиеся с prefix."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT query FROM query_cache "
+            "WHERE plugin = ? AND page = 0 AND query LIKE ? ESCAPE '\\' "
+            "AND query NOT LIKE ':%' ORDER BY fetched_at DESC LIMIT ?",
+            (plugin, _like_prefix(prefix), limit))
+        return [row[0] for row in cursor.fetchall()]
+
+    def prune_query_cache(self, max_age: float):
+        """Удаляет результаты старше max_age секунд."""
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM query_cache WHERE fetched_at < ?",
+                       (time.time() - max_age,))
+        self.conn.commit()
+
+    # ── Каналы ────────────────────────────────────────────────────────────────
+
+    def get_channel(self, channel_id: str) -> dict | None:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT name, avatar_url, fetched_at FROM channels WHERE channel_id = ?",
+            (channel_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return {"channel_id": channel_id, "name": row[0],
+                "avatar_url": row[1], "fetched_at": row[2]}
+
+    def put_channel(self, channel_id: str, name: str, avatar_url: str):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO channels VALUES (?, ?, ?, ?)",
+            (channel_id, name, avatar_url, time.time()))
+        self.conn.commit()
+
+    # ── История поиска ────────────────────────────────────────────────────────
+
+    def add_search_history(self, query: str):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT INTO search_history VALUES (?, 1, ?) "
+            "ON CONFLICT(query) DO UPDATE SET uses = uses + 1, last_used = excluded.last_used",
+            (query, time.time()))
+        self.conn.commit()
+
+    def search_history(self, prefix: str, limit: int = 8) -> List[str]:
+        """Прошлые запросы с prefix: сначала частые, потом недавние."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT query FROM search_history WHERE query LIKE ? ESCAPE '\\' "
+            "ORDER BY uses DESC, last_used DESC LIMIT ?",
+            (_like_prefix(prefix), limit))
+        return [row[0] for row in cursor.fetchall()]
+
     def close(self):
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,276 @@
+# core/disk_cache.py
+"""
+Постоянный дисковый кэш картинок.
+
+Байты хранит FileStore (md5(url).jpg в cache_dir, как раньше) или
+PackStore (append-only сегменты + mmap, см. core/pack_store.py), а рядом маленький
+SQLite-индекс index.db: размер, время доступа, число хитов, время создания
+и HTTP-валидаторы (ETag / Last-Modified) для условных запросов.
+По индексу фоновый проход обслуживания:
+  • удаляет записи, не подтверждённые сервером дольше TTL (если задан)
+  • вытесняет по LRU или LFU, пока суммарный размер не уложится в лимит
+  • подбирает «сиротские» файлы и убирает недописанные .tmp
+  • сжимает сегменты PackStore, в которых много удалённых записей
+Обслуживание идёт в daemon-потоке и никогда не блокирует запуск.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from core.pack_store import FileStore, PackStore
+
+
+class DiskCache:
+    INDEX_NAME = "index.db"
+    # После вытеснения оставляем запас, чтобы не гонять проход на каждой записи
+    LOW_WATERMARK = 0.9
+    # Сколько считаем картинку свежей, если сервер не прислал max-age
+    DEFAULT_FRESHNESS = 24 * 3600
+
+    def __init__(self, cache_dir: str, max_bytes: int,
+                 ttl: float | None = None, policy: str = "lru",
+                 backend: str = "files"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        if backend not in ("files", "pack"):
+            raise ValueError(f"Unknown disk cache backend: {backend}")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy = policy
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.store = PackStore(cache_dir) if backend == "pack" else FileStore(cache_dir)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, self.INDEX_NAME),
+                                     check_same_thread=False)
+        self._create_tables()
+
+        self._touches: dict[str, int] = {}   # key -> хиты, ещё не сброшенные в индекс
+        self._written_since_pass = 0
+        self._maintenance_running = False
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def _create_tables(self):
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key     TEXT PRIMARY KEY,
+                    url     TEXT,
+                    size    INTEGER,
+                    created REAL,
+                    atime   REAL,
+                    hits    INTEGER DEFAULT 0
+                )
+            """)
+            # Колонки валидаторов — добавляем и в индекс от старой версии
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+            for name, decl in (("etag", "TEXT"), ("last_modified", "TEXT"),
+                               ("fetched_at", "REAL"), ("max_age", "REAL")):
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE entries ADD COLUMN {name} {decl}")
+            self._conn.commit()
+
+    # ── Данные ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.md5(url.encode()).hexdigest()
+
+    def has(self, url: str) -> bool:
+        return self.store.has(self.key_for(url))
+
+    def read(self, url: str) -> bytes | memoryview | None:
+        """Байты картинки (для pack — zero-copy memoryview) или None."""
+        return self.store.read(self.key_for(url))
+
+    def write(self, url: str, data: bytes):
+        """Запись байт. Блокирующая — вызывать вне цикла событий."""
+        self.store.write(self.key_for(url), data)
+
+    def discard(self, url: str):
+        """Удаляет одну запись — например, файл, который не декодируется."""
+        key = self.key_for(url)
+        self._touches.pop(key, None)
+        self.store.remove([key])
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    # ── Учёт обращений ────────────────────────────────────────────────────────
+
+    def touch(self, url: str):
+        """Хит по диску. Копится в памяти и сбрасывается в индекс пачкой."""
+        key = self.key_for(url)
+        self._touches[key] = self._touches.get(key, 0) + 1
+
+    def record_write(self, url: str, size: int, etag: str | None = None,
+                     last_modified: str | None = None, max_age: float | None = None):
+        """Файл записан (или перезаписан) — обновляем индекс и валидаторы."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, size, created, atime, hits, "
+                "etag, last_modified, fetched_at, max_age) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                (self.key_for(url), url, size, now, now,
+                 etag, last_modified, now, max_age))
+            self._conn.commit()
+        self._written_since_pass += size
+        # Дописали заметную долю лимита — пора проверить размер
+        if self._written_since_pass > self.max_bytes * (1 - self.LOW_WATERMARK):
+            self.start_maintenance()
+
+    # ── Свежесть и валидаторы ────────────────────────────────────────────────
+
+    def validators(self, url: str) -> dict:
+        """ETag / Last-Modified сохранённого ответа (пустой dict если нет)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE key = ?",
+                (self.key_for(url),)).fetchone()
+        if not row:
+            return {}
+        return {k: v for k, v in (("etag", row[0]), ("last_modified", row[1])) if v}
+
+    def is_stale(self, url: str) -> bool:
+        """True если срок свежести истёк и картинку пора перепроверить."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(fetched_at, created), max_age FROM entries WHERE key = ?",
+                (self.key_for(url),)).fetchone()
+        if not row:
+            return False   # записи нет — это не «протухло», а просто неизвестно
+        fetched_at, max_age = row
+        lifetime = self.DEFAULT_FRESHNESS if max_age is None else max_age
+        return time.time() - (fetched_at or 0) > lifetime
+
+    def mark_fresh(self, url: str, max_age: float | None = None):
+        """Сервер ответил 304 — файл тот же, обновляем только метаданные свежести."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET fetched_at = ?, max_age = COALESCE(?, max_age) "
+                "WHERE key = ?",
+                (time.time(), max_age, self.key_for(url)))
+            self._conn.commit()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return row[0]
+
+    def flush(self):
+        """Сбрасывает накопленные хиты в индекс."""
+        self._flush_touches()
+
+    def _flush_touches(self):
+        if not self._touches:
+            return
+        touches, self._touches = self._touches, {}
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE entries SET atime = ?, hits = hits + ? WHERE key = ?",
+                [(now, n, key) for key, n in touches.items()])
+            self._conn.commit()
+
+    # ── Обслуживание ──────────────────────────────────────────────────────────
+
+    def start_maintenance(self, delay: float = 0.0):
+        """Запускает проход обслуживания в фоновом потоке (если ещё не идёт)."""
+        if self._maintenance_running:
+            return
+        self._maintenance_running = True
+
+        def run():
+            try:
+                if delay:
+                    time.sleep(delay)
+                self.maintain()
+            except Exception as e:
+                print(f"[DiskCache] Ошибка обслуживания: {e}")
+            finally:
+                self._maintenance_running = False
+
+        threading.Thread(target=run, name="disk-cache-maintenance", daemon=True).start()
+
+    def maintain(self):
+        """Синхронный проход: сироты, TTL, вытеснение по лимиту, сжатие."""
+        self._written_since_pass = 0
+        self._flush_touches()
+        self._sync_with_files()
+        if self.ttl:
+            self._drop_expired()
+        self._evict_to_budget()
+        self.store.compact()
+
+    def _sync_with_files(self):
+        """Индекс ↔ файлы: подбираем файлы без записи, выкидываем записи без файла."""
+        on_disk = self.store.scan()
+
+        with self._lock:
+            indexed = {k for (k,) in self._conn.execute("SELECT key FROM entries")}
+            now = time.time()
+            self._conn.executemany(
+                "INSERT INTO entries (key, url, size, created, atime, hits) "
+                "VALUES (?, NULL, ?, ?, ?, 0)",
+                [(k, size, now, now) for k, size in on_disk.items() if k not in indexed])
+            self._conn.executemany(
+                "DELETE FROM entries WHERE key = ?",
+                [(k,) for k in indexed if k not in on_disk])
+            self._conn.commit()
+
+    def _drop_expired(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries WHERE COALESCE(fetched_at, created) < ?",
+                (cutoff,)).fetchall()
+        self._remove_entries(rows)
+
+    def _evict_to_budget(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * self.LOW_WATERMARK)
+        order = ("atime ASC" if self.policy == "lru"
+                 else "hits ASC, atime ASC")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM entries ORDER BY {order}").fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= target:
+                break
+            victims.append((key, size))
+            total -= size or 0
+        self._remove_entries(victims)
+        print(f"[DiskCache] Вытеснено {len(victims)} файлов, осталось {total // 1024} КБ")
+
+    def _remove_entries(self, rows: list[tuple[str, int]]):
+        if not rows:
+            return
+        self.store.remove([key for key, _ in rows])
+        for _, size in rows:
+            self.evictions += 1
+            self.evicted_bytes += size or 0
+        with self._lock:
+            self._conn.executemany("DELETE FROM entries WHERE key = ?",
+                                   [(key,) for key, _ in rows])
+            self._conn.commit()
+
+    # ── Закрытие ──────────────────────────────────────────────────────────────
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            self._flush_touches()
+        finally:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+            self.store.close()
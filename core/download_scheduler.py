@@ -0,0 +1,151 @@
+# core/download_scheduler.py
+"""
+Планировщик загрузок картинок.
+
+  • общий лимит одновременных запросов и отдельный лимит на хост
+  • очередь с приоритетами: видимые карточки → соседние ряды (префетч) → фон
+  • отмена поставленных в очередь и уже идущих загрузок, когда карточка
+    ушла из окна префетча (retain)
+
+Меньший приоритет = раньше. Всё работает в asyncio-цикле главного потока.
+"""
+import heapq
+import asyncio
+import itertools
+from urllib.parse import urlsplit
+from typing import Awaitable, Callable
+
+PRIORITY_URGENT     = 0     # результат кто-то ждёт (get_image)
+PRIORITY_VISIBLE    = 10    # карточка на экране
+PRIORITY_PREFETCH   = 20    # + расстояние в рядах от видимой области
+PRIORITY_BACKGROUND = 100   # ревалидация и прочее, что не горит
+
+
+class DownloadScheduler:
+    def __init__(self, max_concurrent: int = 6, per_host: int = 4):
+        self.max_concurrent = max_concurrent
+        self.per_host = per_host
+
+        self._heap: list[tuple[int, int, str]] = []   # (priority, seq, url)
+        self._seq = itertools.count()
+        self._queued: dict[str, int] = {}            # url -> актуальный приоритет
+        self._factories: dict[str, Callable[[], Awaitable]] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._host_active: dict[str, int] = {}
+        self._pinned: set[str] = set()                # такие не отменяем
+        self.cancelled = 0
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).hostname or ""
+
+    # ── Публичный API ─────────────────────────────────────────────────────────
+
+    def submit(self, url: str, priority: int,
+               factory: Callable[[], Awaitable], pinned: bool = False):
+        """
+        Ставит загрузку в очередь. Повторный submit того же URL только
+        повышает приоритет (меньшее число) и/или закрепляет задачу.
+        """
+        if pinned:
+            self._pinned.add(url)
+        if url in self._running:
+            return
+        current = self._queued.get(url)
+        if current is not None and current <= priority:
+            return
+        self._queued[url] = priority
+        self._factories[url] = factory
+        heapq.heappush(self._heap, (priority, next(self._seq), url))
+        self._pump()
+
+    def retain(self, wanted: dict[str, int]) -> list[str]:
+        """
+        Оставляет только URL из wanted (url -> приоритет), перевыставляя
+        им приоритеты. Остальное снимается из очереди, а идущие загрузки
+        отменяются. Закреплённые (pinned) задачи не трогаем.
+        Возвращает все снятые URL — и из очереди, и отменённые на ходу:
+        отменённая до первого шага задача не выполнит ни строчки своего
+        кода, так что их ожидающих должен завершить вызывающий.
+        """
+        dropped = []
+        for url in list(self._queued):
+            if url not in wanted and url not in self._pinned:
+                del self._queued[url]
+                self._factories.pop(url, None)
+                dropped.append(url)
+        self.cancelled += len(dropped)
+        for url, task in list(self._running.items()):
+            if url not in wanted and url not in self._pinned:
+                task.cancel()
+                # Слот освобождает _on_done; URL сразу можно поставить заново
+                del self._running[url]
+                dropped.append(url)
+
+        reprioritized = False
+        for url, priority in wanted.items():
+            current = self._queued.get(url)
+            if current is not None and current != priority:
+                self._queued[url] = priority
+                heapq.heappush(self._heap, (priority, next(self._seq), url))
+                reprioritized = True
+        if dropped or reprioritized:
+            # Выкидываем из кучи устаревшие записи, чтобы она не росла бесконечно
+            self._heap = [e for e in self._heap if self._queued.get(e[2]) == e[0]]
+            heapq.heapify(self._heap)
+        self._pump()
+        return dropped
+
+    def is_scheduled(self, url: str) -> bool:
+        return url in self._queued or url in self._running
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queued)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    # ── Внутреннее ────────────────────────────────────────────────────────────
+
+    def _pump(self):
+        deferred = []
+        while self._heap and len(self._running) < self.max_concurrent:
+            priority, seq, url = heapq.heappop(self._heap)
+            if self._queued.get(url) != priority:
+                continue   # устаревшая запись (приоритет менялся или снята)
+            host = self._host(url)
+            if self._host_active.get(host, 0) >= self.per_host:
+                deferred.append((priority, seq, url))
+                continue
+            del self._queued[url]
+            factory = self._factories.pop(url)
+            self._host_active[host] = self._host_active.get(host, 0) + 1
+            try:
+                task = asyncio.create_task(factory())
+            except RuntimeError:
+                # Цикл ещё не запущен
+                self._host_active[host] -= 1
+                continue
+            self._running[url] = task
+            task.add_done_callback(
+                lambda t, url=url, host=host: self._on_done(url, host, t))
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+
+    def _on_done(self, url: str, host: str, task: asyncio.Task):
+        """
+        Учёт слотов — в колбэке, а не в finally задачи: задача, отменённая
+        до первого шага, свой код не выполняет вовсе, а колбэк вызовется.
+        """
+        if task.cancelled():
+            self.cancelled += 1
+        else:
+            task.exception()   # ошибки разбирает сама фабрика — здесь гасим
+        self._host_active[host] -= 1
+        if self._running.get(url) is task:
+            del self._running[url]
+        if url not in self._running:
+            self._pinned.discard(url)
+        self._pump()
@@ -0,0 +1,91 @@
+# core/enrichment.py
+"""
+Дозаполнение карточек: аватарки, точные просмотры, даты загрузки.
+
+Сетка показывает результаты сразу, а подробности приходят по одной
+карточке через plugin.enrich(item). Работает только окно вокруг экрана
+(set_window), видимые карточки — первыми; ушедшие с экрана отменяются.
+Каждая готовая карточка — отдельный сигнал enriched(video_id, fields),
+так что один медленный канал не задерживает остальные.
+"""
+import asyncio
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class _EnrichSignaller(QObject):
+    enriched = pyqtSignal(str, object)   # video_id, dict новых полей
+
+
+class EnrichmentPipeline:
+    def __init__(self, max_concurrent: int = 2):
+        self.max_concurrent = max_concurrent
+        self.plugin = None
+        # plugin_for(item) — источник карточки в федеративной выдаче;
+        # None или пустой ответ — self.plugin
+        self.plugin_for = None
+        self._signaller = _EnrichSignaller()
+        self.enriched = self._signaller.enriched   # пробрасываем наружу
+        self._queue: list[dict] = []                # ждут, по приоритету
+        self._running: dict[str, asyncio.Task] = {}
+        self._done: set[str] = set()
+
+    def set_plugin(self, plugin):
+        if plugin is self.plugin:
+            return
+        self.plugin = plugin
+        self.reset()
+
+    def reset(self):
+        """
+        Сетка пересобрана из свежих словарей (новая лента, выдача из кэша) —
+        прежние дозаполнения в них не попали, обрабатываем заново.
+        """
+        for task in self._running.values():
+            task.cancel()
+        self._running.clear()
+        self._queue = []
+        self._done.clear()
+
+    def set_window(self, items: list[dict]):
+        """
+        Карточки, которые сейчас нужны (видимые первыми). Всё, чего в
+        списке нет, снимается с очереди, идущие обработки отменяются.
+        """
+        wanted = {item.get("id") for item in items}
+        for video_id, task in list(self._running.items()):
+            if video_id not in wanted:
+                task.cancel()
+        self._queue = [item for item in items
+                       if item.get("id") and item["id"] not in self._done
+                       and item["id"] not in self._running]
+        self._pump()
+
+    def _pump(self):
+        if self.plugin is None:
+            return
+        while self._queue and len(self._running) < self.max_concurrent:
+            item = self._queue.pop(0)
+            video_id = item["id"]
+            if video_id in self._done or video_id in self._running:
+                continue
+            self._running[video_id] = asyncio.ensure_future(self._run(item))
+
+    async def _run(self, item: dict):
+        video_id = item["id"]
+        try:
+            plugin = (self.plugin_for(item) if self.plugin_for else None) or self.plugin
+            fields = await plugin.enrich(item)
+            self._done.add(video_id)
+            if fields:
+                self.enriched.emit(video_id, fields)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[Enrich] {video_id}: {type(e).__name__}: {e}")
+            self._done.add(video_id)
+        finally:
+            # После reset() под этим id может работать уже новая задача
+            if self._running.get(video_id) is asyncio.current_task():
+                del self._running[video_id]
+                self._pump()
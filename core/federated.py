@@ -0,0 +1,88 @@
+# core/federated.py
+"""
+Федеративный поиск: один запрос ко всем готовым плагинам сразу.
+
+Каждый источник — свой async-генератор (plugin.search_stream), все
+читаются параллельно, результаты отдаются по мере прихода:
+  • дубли по id отбрасываются — остаётся пришедший первым
+  • каждому результату ставится ранг [страница, место в источнике,
+    номер источника] — выдачи чередуются, порядок не зависит от того,
+    кто ответил быстрее (сетка вставляет карточку по рангу, см. bisect)
+  • у источника свой срок deadline на страницу: медленный обрывается,
+    уже пришедшее от него остаётся, общая задержка — не больше deadline
+  • если хоть один источник оборвался или упал, страница в конце
+    бросает PartialResults — показана, но в кэш не попадёт
+"""
+import asyncio
+import time
+from typing import AsyncIterator
+
+from core.interfaces import PartialResults
+
+
+class FederatedSearch:
+    DEADLINE = 12.0
+
+    def __init__(self, plugins: list, deadline: float = DEADLINE):
+        self.plugins = plugins
+        self.deadline = deadline
+
+    @property
+    def name(self) -> str:
+        """Ключ для QueryCache: состав источников."""
+        return "+".join(sorted(p.name for p in self.plugins))
+
+    async def search_stream(self, query: str, page: int = 0) -> AsyncIterator[dict]:
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [asyncio.ensure_future(self._pump(index, plugin, query, page, queue))
+                 for index, plugin in enumerate(self.plugins)]
+        seen: set[str] = set()
+        try:
+            for _ in range(len(tasks)):
+                while (item := await queue.get()) is not None:
+                    vid = item.get("id")
+                    if vid:
+                        if vid in seen:
+                            continue
+                        seen.add(vid)
+                    yield item
+            complete = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        cut = [p.name for p, ok in zip(self.plugins, complete) if not ok]
+        if cut:
+            raise PartialResults(f"не дождались: {', '.join(cut)}")
+
+    async def _pump(self, index: int, plugin, query: str, page: int,
+                    queue: asyncio.Queue):
+        """
+        Читает один источник до конца или до срока; None в очереди —
+        источник закончил. Возвращает False, если выдача оборвалась.
+        """
+        started = time.monotonic()
+        stream = plugin.search_stream(query, page)
+        count = 0
+        complete = False
+        try:
+            while True:
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                item = await asyncio.wait_for(anext(stream), remaining)
+                item = dict(item, source=plugin.name, rank=[page, count, index])
+                count += 1
+                queue.put_nowait(item)
+        except StopAsyncIteration:
+            complete = True
+        except asyncio.TimeoutError:
+            print(f"[Federated] {plugin.name}: срок {self.deadline:g} с истёк "
+                  f"после {count} результатов")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Federated] {plugin.name}: {type(e).__name__}: {e}")
+        finally:
+            await stream.aclose()
+            queue.put_nowait(None)
+        return complete
@@ -0,0 +1,147 @@
+# core/image_decoder.py
+"""
+Декодирование картинок вне GUI-потока.
+
+JPEG → QImage (и сразу масштабирование под карточку) выполняется в
+QThreadPool. Байты берутся через loader() прямо в рабочем потоке —
+это чтение файла или zero-copy срез mmap из PackStore.
+Когда нужен конкретный размер, декодируем сразу в него: QImageReader с
+setScaledSize (для JPEG это DCT-масштабирование в libjpeg — полный
+480x360 даже не разворачивается) и setScaledClipRect для обрезки по центру.
+QImage можно безопасно создавать в любом потоке, а QPixmap — только в GUI,
+поэтому наружу уходит QImage через сигнал decoded(key, image): сигналлер
+живёт в главном потоке, и Qt доставляет его queued-соединением.
+"""
+from typing import Callable
+
+from PyQt5.QtCore import (Qt, QObject, QRunnable, QThreadPool, QSize, QRect,
+                          QBuffer, QByteArray, QIODevice, pyqtSignal)
+from PyQt5.QtGui import QImage, QImageReader
+
+
+def scale_to_fill(img, size: QSize, dpr: float):
+    """
+    KeepAspectRatioByExpanding + обрезка по центру до size * dpr.
+    Работает и с QImage, и с QPixmap.
+    """
+    tw = max(1, round(size.width() * dpr))
+    th = max(1, round(size.height() * dpr))
+    scaled = img.scaled(tw, th, Qt.KeepAspectRatioByExpanding,
+                        Qt.SmoothTransformation)
+    x = (scaled.width() - tw) // 2
+    y = (scaled.height() - th) // 2
+    out = scaled.copy(x, y, tw, th)
+    out.setDevicePixelRatio(dpr)
+    return out
+
+
+def load_from_data(target, data) -> bool:
+    """
+    target.loadFromData(data) для QImage/QPixmap. memoryview пробуем
+    отдать как есть (без копии); если sip его не принимает — через bytes.
+    """
+    try:
+        return target.loadFromData(data)
+    except TypeError:
+        return target.loadFromData(bytes(data))
+
+
+def _to_qbytearray(data) -> QByteArray:
+    try:
+        return QByteArray(data)
+    except TypeError:
+        return QByteArray(bytes(data))
+
+
+def decode_scaled(data, size: QSize, dpr: float) -> QImage:
+    """
+    Декодирует сразу в size * dpr (KeepAspectRatioByExpanding + обрезка
+    по центру), не разворачивая картинку в полном разрешении.
+    Если формат не сообщает размер заранее — обычный декод + scale_to_fill.
+    """
+    tw = max(1, round(size.width() * dpr))
+    th = max(1, round(size.height() * dpr))
+    buf = QBuffer()
+    buf.setData(_to_qbytearray(data))
+    buf.open(QIODevice.ReadOnly)
+    reader = QImageReader(buf)
+    orig = reader.size()
+    if orig.isValid() and not orig.isEmpty():
+        scaled = orig.scaled(tw, th, Qt.KeepAspectRatioByExpanding)
+        reader.setScaledSize(scaled)
+        reader.setScaledClipRect(QRect((scaled.width() - tw) // 2,
+                                       (scaled.height() - th) // 2, tw, th))
+        img = reader.read()
+        if not img.isNull():
+            img.setDevicePixelRatio(dpr)
+            return img
+    img = QImage()
+    load_from_data(img, data)
+    return scale_to_fill(img, size, dpr) if not img.isNull() else img
+
+
+class _DecodeSignaller(QObject):
+    decoded = pyqtSignal(object, QImage)   # key, image (isNull() при ошибке)
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, key, loader: Callable[[], bytes | memoryview | None],
+                 size: QSize | None, dpr: float, signaller: _DecodeSignaller):
+        super().__init__()
+        self.key = key
+        self.loader = loader
+        self.size = size
+        self.dpr = dpr
+        self.signaller = signaller
+
+    def run(self):
+        img = QImage()
+        try:
+            data = self.loader()
+            if data is not None:
+                if self.size is not None:
+                    img = decode_scaled(data, self.size, self.dpr)
+                else:
+                    load_from_data(img, data)
+                del data   # отпускаем срез mmap как можно раньше
+        except Exception as e:
+            print(f"[Decoder] {self.key}: {e}")
+            img = QImage()
+        self.signaller.decoded.emit(self.key, img)
+
+
+class ImageDecoder:
+    def __init__(self, max_threads: int = 2):
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max_threads)
+        self._signaller = _DecodeSignaller()
+        self._signaller.decoded.connect(self._on_decoded)
+        self.decoded = self._signaller.decoded   # пробрасываем наружу
+        self._pending: set = set()
+
+    def submit(self, key, loader: Callable[[], bytes | memoryview | None],
+               size: QSize | None = None, dpr: float = 1.0) -> bool:
+        """
+        Ставит декодирование в пул. loader() вызывается в рабочем потоке.
+        False если такой ключ уже в работе.
+        """
+        if key in self._pending:
+            return False
+        self._pending.add(key)
+        self._pool.start(_DecodeJob(key, loader, QSize(size) if size else None,
+                                    dpr, self._signaller))
+        return True
+
+    def is_pending(self, key) -> bool:
+        return key in self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def _on_decoded(self, key, img: QImage):
+        self._pending.discard(key)
+
+    def shutdown(self):
+        self._pool.clear()
+        self._pool.waitForDone(1000)
@@ -1,11 +1,55 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
+
+
+class PartialResults(Exception):
+    """
+    Выдача оборвалась на середине (таймаут, упавший воркер). Бросается из
+    search_stream() после уже отданных результатов: их показываем, но
+    как полную страницу не кэшируем. results — что успели собрать.
+    """
+
+    def __init__(self, message: str = "", results: list | None = None):
+        super().__init__(message)
+        self.results = results if results is not None else []
+
+
+async def collect(items) -> list:
+    """Собирает async-генератор выдачи; обрыв — PartialResults с собранным."""
+    results = []
+    try:
+        async for item in items:
+            results.append(item)
+    except PartialResults as e:
+        raise PartialResults(str(e), results) from None
+    return results
+
 
 class BasePlugin(ABC):
     """
     Абстрактный базовый класс для всех плагинов-источников.
     """
-    
+
+    # Размер превью на карточке (логические пиксели) и DPR экрана —
+    # плагин может выбрать вариант картинки, которого хватает без избытка.
+    thumbnail_hint: tuple[int, int, float] = (320, 180, 1.0)
+
+    # Сколько результатов на странице выдачи (search_stream/trending_stream)
+    page_size: int = 20
+
+    # Сервисы приложения (Database, CacheManager); задаёт bind_services()
+    db = None
+    cache_manager = None
+
+    def bind_services(self, db=None, cache_manager=None):
+        """Передаёт плагину общие хранилища приложения — до initialize()."""
+        self.db = db
+        self.cache_manager = cache_manager
+
+    def set_thumbnail_hint(self, width: int, height: int, dpr: float = 1.0):
+        """Сообщает плагину, под какой размер карточки выбирать превью."""
+        self.thumbnail_hint = (width, height, dpr)
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -21,6 +65,23 @@ class BasePlugin(ABC):
         """Поиск видео. Возвращает список словарей с метаданными."""
         pass
 
+    async def search_stream(self, query: str, page: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Поиск с выдачей по одному результату, как только он готов.
+        page — номер страницы по page_size результатов; пустая страница
+        означает конец выдачи. По умолчанию — только первая страница
+        из search(); плагины с пагинацией переопределяют.
+        """
+        if page == 0:
+            for item in await self.search(query):
+                yield item
+
+    async def trending_stream(self, page: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Тренды постранично, как search_stream()."""
+        if page == 0:
+            for item in await self.get_trending():
+                yield item
+
     @abstractmethod
     async def get_trending(self) -> List[Dict[str, Any]]:
         """Получение трендов."""
@@ -29,4 +90,41 @@ class BasePlugin(ABC):
     @abstractmethod
     async def get_stream_url(self, video_id: str) -> str:
         """Получение прямой ссылки на поток (для mpv)."""
-        pass
\ No newline at end of file
+        pass
+
+    async def get_related(self, video_id: str, title: str = "") -> List[Dict[str, Any]]:
+        """
+        Похожие видео. По умолчанию — поиск по началу заголовка;
+        плагины с настоящим API рекомендаций переопределяют.
+        """
+        if not title:
+            return []
+        results = await self.search(title[:40])
+        return [r for r in results if r.get("id") != video_id]
+
+    def cached_related(self, video_id: str) -> List[Dict[str, Any]] | None:
+        """Похожие, если они уже получены (без запроса), иначе None."""
+        return None
+
+    async def enrich(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Подробности для одной карточки, которых нет в выдаче поиска
+        (avatar_url, view_count, upload_date). Возвращает только новые поля.
+        """
+        return {}
+
+    async def get_stream_info(self, video_id: str) -> Dict[str, Any]:
+        """
+        Ссылка на поток с метаданными формата: url, width, height, fps,
+        duration. Плагины с кэшем ссылок переопределяют; по умолчанию —
+        только url из get_stream_url().
+        """
+        return {"url": await self.get_stream_url(video_id)}
+
+    def cached_stream(self, video_id: str) -> Dict[str, Any] | None:
+        """Уже полученная и ещё живая ссылка на поток (без запроса), иначе None."""
+        return None
+
+    def invalidate_stream(self, video_id: str):
+        """Ссылка на поток перестала работать (403) — забыть её."""
+        pass
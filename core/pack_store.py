@@ -0,0 +1,259 @@
+# core/pack_store.py
+"""
+Хранилища байтов для DiskCache.
+
+FileStore — по файлу md5.jpg на картинку (как было всегда).
+PackStore — упакованное хранилище: append-only сегменты packs/seg-NNNNN.pack
+и индекс key -> (сегмент, смещение, длина) в памяти. Чтение через mmap:
+read() отдаёт memoryview прямо в страницы файла, без копии — его можно
+сразу передать в QImage.loadFromData. Поиск — это dict-хит, без stat/open.
+
+Формат записи в сегменте:
+    magic 'NXPK' | md5 ключа (16 байт) | длина (uint32) | флаг (uint8) | данные
+Флаг 1 — «надгробие»: ключ удалён. Индекс восстанавливается при запуске
+проходом по заголовкам. Удалённые записи физически убирает compact().
+"""
+import os
+import mmap
+import struct
+import threading
+
+_HEADER = struct.Struct("<4s16sIB")
+_MAGIC = b"NXPK"
+_FLAG_DATA = 0
+_FLAG_TOMBSTONE = 1
+
+
+class FileStore:
+    """Один файл на ключ — cache_dir/<key>.jpg."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".jpg")
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def read(self, key: str) -> bytes | None:
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write(self, key: str, data: bytes):
+        path = self.path(key)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def remove(self, keys: list[str]):
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def scan(self) -> dict[str, int]:
+        """key -> размер для всех файлов; недописанные .tmp удаляются."""
+        found: dict[str, int] = {}
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".tmp"):
+                # Недописанный файл от прошлого запуска
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.name.endswith(".jpg"):
+                found[entry.name[:-4]] = entry.stat().st_size
+        return found
+
+    def compact(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PackStore:
+    # Новый сегмент начинается, когда текущий вырос больше этого
+    SEGMENT_MAX = 32 * 1024 * 1024
+    # Сегмент переписывается, когда мёртвых байт в нём больше этой доли
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, cache_dir: str):
+        self.dir = os.path.join(cache_dir, "packs")
+        os.makedirs(self.dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._index: dict[str, tuple[int, int, int]] = {}   # key -> (seg, offset, len)
+        self._seg_total: dict[int, int] = {}   # байт в сегменте всего
+        self._seg_live: dict[int, int] = {}    # из них живых данных
+        self._maps: dict[int, mmap.mmap] = {}
+        self._retired: list[mmap.mmap] = []    # ещё есть ссылки из memoryview
+        self._load()
+        self._active = max(self._seg_total, default=0) or self._new_segment()
+        self._writer = open(self._seg_path(self._active), "ab")
+
+    # ── Сегменты ──────────────────────────────────────────────────────────────
+
+    def _seg_path(self, seg: int) -> str:
+        return os.path.join(self.dir, f"seg-{seg:05d}.pack")
+
+    def _new_segment(self) -> int:
+        seg = max(self._seg_total, default=0) + 1
+        open(self._seg_path(seg), "ab").close()
+        self._seg_total[seg] = 0
+        self._seg_live[seg] = 0
+        return seg
+
+    def _load(self):
+        """Восстанавливает индекс по заголовкам записей всех сегментов."""
+        segs = sorted(int(n[4:9]) for n in os.listdir(self.dir)
+                      if n.startswith("seg-") and n.endswith(".pack"))
+        for seg in segs:
+            self._seg_total[seg] = 0
+            self._seg_live[seg] = 0
+            path = self._seg_path(seg)
+            size = os.path.getsize(path)
+            with open(path, "rb") as f:
+                pos = 0
+                while pos + _HEADER.size <= size:
+                    f.seek(pos)
+                    magic, raw_key, length, flag = _HEADER.unpack(f.read(_HEADER.size))
+                    if magic != _MAGIC or pos + _HEADER.size + length > size:
+                        break   # хвост недописан (упали посреди записи)
+                    self._apply(raw_key.hex(), seg, pos + _HEADER.size, length, flag)
+                    pos += _HEADER.size + length
+            self._seg_total[seg] = pos
+            if pos < size:
+                # Обрезаем битый хвост, чтобы дописывать с корректного места
+                with open(path, "r+b") as f:
+                    f.truncate(pos)
+
+    def _apply(self, key: str, seg: int, offset: int, length: int, flag: int):
+        old = self._index.pop(key, None)
+        if old is not None:
+            self._seg_live[old[0]] -= old[2]
+        if flag == _FLAG_DATA:
+            self._index[key] = (seg, offset, length)
+            self._seg_live[seg] += length
+
+    def _append(self, key: str, data: bytes, flag: int) -> int:
+        """Дописывает запись в активный сегмент; возвращает смещение данных."""
+        if self._seg_total[self._active] >= self.SEGMENT_MAX:
+            self._writer.close()
+            self._active = self._new_segment()
+            self._writer = open(self._seg_path(self._active), "ab")
+        pos = self._seg_total[self._active]
+        self._writer.write(_HEADER.pack(_MAGIC, bytes.fromhex(key), len(data), flag))
+        self._writer.write(data)
+        self._writer.flush()
+        self._seg_total[self._active] = pos + _HEADER.size + len(data)
+        return pos + _HEADER.size
+
+    def _map(self, seg: int, end: int) -> mmap.mmap:
+        """mmap сегмента, покрывающий байты до end (активный сегмент растёт)."""
+        mm = self._maps.get(seg)
+        if mm is None or len(mm) < end:
+            if mm is not None:
+                self._release(mm)
+            with open(self._seg_path(seg), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[seg] = mm
+        return mm
+
+    def _release(self, mm: mmap.mmap):
+        try:
+            mm.close()
+        except BufferError:
+            # Кто-то ещё держит memoryview — закроем позже
+            self._retired.append(mm)
+
+    def _release_retired(self):
+        still = []
+        for mm in self._retired:
+            try:
+                mm.close()
+            except BufferError:
+                still.append(mm)
+        self._retired = still
+
+    # ── API хранилища ─────────────────────────────────────────────────────────
+
+    def has(self, key: str) -> bool:
+        return key in self._index
+
+    def read(self, key: str) -> memoryview | None:
+        """Zero-copy срез mmap. Держать недолго — он не даёт закрыть сегмент."""
+        with self._lock:
+            loc = self._index.get(key)
+            if loc is None:
+                return None
+            seg, offset, length = loc
+            mm = self._map(seg, offset + length)
+            return memoryview(mm)[offset:offset + length]
+
+    def write(self, key: str, data: bytes):
+        with self._lock:
+            offset = self._append(key, data, _FLAG_DATA)
+            self._apply(key, self._active, offset, len(data), _FLAG_DATA)
+
+    def remove(self, keys: list[str]):
+        with self._lock:
+            for key in keys:
+                if key in self._index:
+                    self._append(key, b"", _FLAG_TOMBSTONE)
+                    self._apply(key, self._active, 0, 0, _FLAG_TOMBSTONE)
+
+    def scan(self) -> dict[str, int]:
+        with self._lock:
+            return {key: loc[2] for key, loc in self._index.items()}
+
+    def compact(self):
+        """
+        Переписывает живые записи из «дырявых» сегментов в активный
+        и удаляет старые файлы. Вызывается из прохода вытеснения.
+        """
+        with self._lock:
+            victims = [seg for seg, total in self._seg_total.items()
+                       if seg != self._active and total
+                       and 1 - self._seg_live[seg] / total > self.COMPACT_RATIO]
+            for seg in sorted(victims):
+                has_older = any(s < seg for s in self._seg_total)
+                end = self._seg_total[seg]
+                mm = self._map(seg, end)
+                pos = 0
+                while pos + _HEADER.size <= end:
+                    _, raw_key, length, flag = _HEADER.unpack_from(mm, pos)
+                    key = raw_key.hex()
+                    data_off = pos + _HEADER.size
+                    if flag == _FLAG_DATA and self._index.get(key) == (seg, data_off, length):
+                        data = mm[data_off:data_off + length]   # копия байт
+                        new_offset = self._append(key, data, _FLAG_DATA)
+                        self._apply(key, self._active, new_offset, length, _FLAG_DATA)
+                    elif flag == _FLAG_TOMBSTONE and key not in self._index and has_older:
+                        # Иначе после перезапуска «воскреснет» копия из старого сегмента
+                        self._append(key, b"", _FLAG_TOMBSTONE)
+                    pos = data_off + length
+                self._release(self._maps.pop(seg))
+                try:
+                    os.remove(self._seg_path(seg))
+                except OSError:
+                    continue   # Windows не даёт удалить отображённый файл — в следующий раз
+                del self._seg_total[seg]
+                del self._seg_live[seg]
+            self._release_retired()
+            if victims:
+                print(f"[PackStore] Сжато сегментов: {len(victims)}")
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            for mm in self._maps.values():
+                self._release(mm)
+            self._maps.clear()
@@ -1,40 +1,195 @@
 import os
+import ast
+import asyncio
 import importlib.util
 import inspect
-from typing import Dict
+from typing import Callable, Dict
 from core.interfaces import BasePlugin
 
+# Состояния плагина
+STATE_DISCOVERED = "discovered"   # найден по манифесту, модуль не импортирован
+STATE_LOADING    = "loading"      # импорт / initialize() идёт
+STATE_READY      = "ready"
+STATE_FAILED     = "failed"
+STATE_TIMEOUT    = "timeout"      # initialize() не уложился в init_timeout
+
+
+class PluginEntry:
+    """Найденный плагин: манифест, а после загрузки — экземпляр и состояние."""
+
+    def __init__(self, name: str, path: str, class_name: str | None, manifest: dict):
+        self.name = name
+        self.path = path
+        self.class_name = class_name
+        self.manifest = manifest
+        self.instance: BasePlugin | None = None
+        self.state = STATE_DISCOVERED
+        self.error = ""
+        self._load_task: asyncio.Future | None = None
+
+
+def read_manifest(path: str) -> dict | None:
+    """
+    PLUGIN_MANIFEST = {...} из файла плагина без импорта модуля:
+    только разбор AST и literal_eval, код плагина не выполняется.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"[PluginManager] {os.path.basename(path)}: {e}")
+        return None
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id == "PLUGIN_MANIFEST"):
+            try:
+                manifest = ast.literal_eval(node.value)
+            except ValueError:
+                return None
+            return manifest if isinstance(manifest, dict) and manifest.get("name") else None
+    return None
+
+
 class PluginManager:
-    def __init__(self, plugin_folder: str = "plugins"):
+    # Сколько ждать initialize() одного плагина
+    INIT_TIMEOUT = 15.0
+
+    def __init__(self, plugin_folder: str = "plugins", init_timeout: float = INIT_TIMEOUT):
         self.plugin_folder = plugin_folder
-        self.plugins: Dict[str, BasePlugin] = {}
+        self.init_timeout = init_timeout
+        self.entries: Dict[str, PluginEntry] = {}
         self.active_plugin: BasePlugin = None
+        self._services: tuple = (None, None)
+        # Подписчики на смену состояния: callback(name, state)
+        self.state_listeners: list[Callable[[str, str], None]] = []
+
+    @property
+    def plugins(self) -> Dict[str, BasePlugin]:
+        """Уже загруженные экземпляры."""
+        return {name: e.instance for name, e in self.entries.items() if e.instance}
+
+    def set_services(self, db=None, cache_manager=None):
+        """Сервисы, которые получит каждый плагин при загрузке (bind_services)."""
+        self._services = (db, cache_manager)
+        for plugin in self.plugins.values():
+            plugin.bind_services(db, cache_manager)
+
+    # ── Обнаружение ───────────────────────────────────────────────────────────
 
     def load_plugins(self):
+        """
+        Находит плагины по PLUGIN_MANIFEST без импорта — быстро, окно не ждёт.
+        Файлы без манифеста импортируются сразу, как раньше.
+        """
         if not os.path.exists(self.plugin_folder):
             os.makedirs(self.plugin_folder)
 
-        for filename in os.listdir(self.plugin_folder):
-            if filename.endswith(".py") and not filename.startswith("__"):
-                self._load_file(filename)
+        for filename in sorted(os.listdir(self.plugin_folder)):
+            if not filename.endswith(".py") or filename.startswith("__"):
+                continue
+            path = os.path.join(self.plugin_folder, filename)
+            manifest = read_manifest(path)
+            if manifest is None:
+                self._load_legacy(path)
+                continue
+            entry = PluginEntry(manifest["name"], path, manifest.get("class"), manifest)
+            self.entries[entry.name] = entry
+            print(f"[PluginManager] Found: {entry.name}")
 
-    def _load_file(self, filename: str):
-        path = os.path.join(self.plugin_folder, filename)
-        module_name = filename[:-3]
-        
+    def _load_legacy(self, path: str):
+        try:
+            for cls in self._plugin_classes(self._import(path)):
+                instance = cls()
+                entry = PluginEntry(instance.name, path, cls.__name__, {})
+                self._attach(entry, instance)
+                self.entries[entry.name] = entry
+                print(f"[PluginManager] Loaded (no manifest): {instance.name}")
+        except Exception as e:
+            print(f"[PluginManager] {os.path.basename(path)}: {type(e).__name__}: {e}")
+
+    @staticmethod
+    def _import(path: str):
+        module_name = os.path.splitext(os.path.basename(path))[0]
         spec = importlib.util.spec_from_file_location(module_name, path)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
+        return module
+
+    @staticmethod
+    def _plugin_classes(module) -> list:
+        return [obj for _, obj in inspect.getmembers(module, inspect.isclass)
+                if issubclass(obj, BasePlugin) and obj is not BasePlugin
+                and obj.__module__ == module.__name__]
+
+    def _attach(self, entry: PluginEntry, instance: BasePlugin):
+        entry.instance = instance
+        instance.bind_services(*self._services)
+
+    def _set_state(self, entry: PluginEntry, state: str, error: str = ""):
+        entry.state = state
+        entry.error = error
+        for listener in self.state_listeners:
+            listener(entry.name, state)
+
+    # ── Загрузка и инициализация ──────────────────────────────────────────────
+
+    async def load(self, name: str) -> BasePlugin:
+        """
+        Импорт (в пуле потоков — тяжёлые зависимости не блокируют GUI),
+        создание экземпляра в главном потоке и initialize() с таймаутом.
+        Повторные вызовы ждут ту же загрузку.
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            raise ValueError(f"Plugin {name} not found")
+        if entry._load_task is None:
+            entry._load_task = asyncio.ensure_future(self._load_entry(entry))
+        return await asyncio.shield(entry._load_task)
+
+    async def _load_entry(self, entry: PluginEntry) -> BasePlugin:
+        self._set_state(entry, STATE_LOADING)
+        if entry.instance is None:
+            loop = asyncio.get_running_loop()
+            try:
+                module = await loop.run_in_executor(None, self._import, entry.path)
+                classes = [c for c in self._plugin_classes(module)
+                           if not entry.class_name or c.__name__ == entry.class_name]
+                if not classes:
+                    raise ImportError(f"класс плагина не найден в {entry.path}")
+                self._attach(entry, classes[0]())
+            except Exception as e:
+                self._set_state(entry, STATE_FAILED, f"{type(e).__name__}: {e}")
+                print(f"[PluginManager] {entry.name}: {entry.error}")
+                raise
+
+        try:
+            ok = await asyncio.wait_for(entry.instance.initialize(), self.init_timeout)
+            self._set_state(entry, STATE_READY if ok else STATE_FAILED)
+        except asyncio.TimeoutError:
+            self._set_state(entry, STATE_TIMEOUT)
+            print(f"[PluginManager] {entry.name}: initialize() дольше {self.init_timeout:g} с")
+        except Exception as e:
+            self._set_state(entry, STATE_FAILED, f"{type(e).__name__}: {e}")
+            print(f"[PluginManager] {entry.name}: {entry.error}")
+        print(f"[PluginManager] {entry.name}: {entry.state}")
+        return entry.instance
+
+    async def initialize_all(self):
+        """Все найденные плагины параллельно; зависший не задерживает остальных."""
+        await asyncio.gather(*(self.load(name) for name in self.entries),
+                             return_exceptions=True)
+
+    def ready_plugins(self) -> list[BasePlugin]:
+        """Готовые плагины в порядке обнаружения — источники федеративного поиска."""
+        return [e.instance for e in self.entries.values()
+                if e.instance and e.state == STATE_READY]
 
-        for name, obj in inspect.getmembers(module):
-            if inspect.isclass(obj) and issubclass(obj, BasePlugin) and obj is not BasePlugin:
-                instance = obj()
-                self.plugins[instance.name] = instance
-                print(f"[PluginManager] Loaded: {instance.name}")
+    def state(self, name: str) -> str:
+        entry = self.entries.get(name)
+        return entry.state if entry else STATE_FAILED
 
     async def set_active_plugin(self, name: str):
-        if name in self.plugins:
-            self.active_plugin = self.plugins[name]
-            await self.active_plugin.initialize()
-        else:
-            raise ValueError(f"Plugin {name} not found")
\ No newline at end of file
+        # Даже после таймаута initialize() экземпляр годен — плагин сам
+        # откатывается на медленные пути (например, CLI вместо пула yt-dlp)
+        self.active_plugin = await self.load(name)
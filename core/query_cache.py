@@ -0,0 +1,150 @@
+# core/query_cache.py
+"""
+Кэш результатов поиска/трендов по ключу (плагин, запрос, страница).
+
+Два уровня: LRU в памяти и таблица query_cache в Database (переживает
+перезапуск). Политика stale-while-revalidate:
+  • свежие (моложе ttl) — отдаются сразу, без yt-dlp
+  • устаревшие (моложе max_stale) — отдаются сразу, а в фоне идёт
+    обновление; новый список приходит в on_update
+  • старше max_stale или нет в кэше — ждём загрузку
+Пустые списки не кэшируются: так плагин сообщает об ошибке. Оборванная
+выдача (PartialResults) отдаётся ожидающим, но тоже не кэшируется.
+Загрузка одна на ключ; когда её отменяет последний ожидающий
+(запрос устарел), отменяется и сама загрузка — вместе с yt-dlp.
+"""
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from core.database import Database
+from core.interfaces import PartialResults
+
+
+class QueryCache:
+    DEFAULT_TTL = 15 * 60
+    DEFAULT_MAX_STALE = 24 * 3600
+    MEMORY_ENTRIES = 64
+
+    def __init__(self, db: Database, ttl: float = DEFAULT_TTL,
+                 max_stale: float = DEFAULT_MAX_STALE):
+        self.db = db
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._memory: OrderedDict[tuple, tuple[list, float]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._waiters: dict[asyncio.Future, int] = {}
+        db.prune_query_cache(max_stale)
+
+    @staticmethod
+    def make_key(plugin: str, query: str, page: int = 0) -> tuple:
+        return plugin, " ".join(query.lower().split()), page
+
+    # ── Хранилище ─────────────────────────────────────────────────────────────
+
+    def lookup(self, key: tuple) -> tuple[list, float] | None:
+        """(results, возраст в секундах) или None."""
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self.db.get_query_results(*key)
+            if entry is None:
+                return None
+            self._remember(key, entry)
+        else:
+            self._memory.move_to_end(key)
+        results, fetched_at = entry
+        return results, time.time() - fetched_at
+
+    def store(self, key: tuple, results: list):
+        if not results:
+            return
+        now = time.time()
+        self._remember(key, (results, now))
+        self.db.put_query_results(*key, results, now)
+
+    def known_queries(self, plugin: str, prefix: str, limit: int = 8) -> list[str]:
+        """Запросы, по которым есть кэш, — для подсказок в поиске."""
+        prefix = " ".join(prefix.lower().split())
+        return self.db.cached_queries(plugin, prefix, limit) if prefix else []
+
+    def invalidate(self, key: tuple):
+        self._memory.pop(key, None)
+
+    def _remember(self, key: tuple, entry: tuple[list, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    # ── Загрузка ──────────────────────────────────────────────────────────────
+
+    async def get(self, key: tuple, fetch: Callable[[], Awaitable[list]],
+                  on_update: Callable[[list], None] | None = None,
+                  load: Callable[[], Awaitable[list]] | None = None) -> list:
+        """
+        Результаты для key. fetch() — запрос к плагину; если отданы
+        устаревшие данные, on_update(новые) вызовется после фонового обновления
+        (только если список действительно изменился).
+        load() — чем грузить при промахе, когда пользователь ждёт (например,
+        потоково прямо в сетку); по умолчанию тот же fetch().
+        """
+        cached = self.lookup(key)
+        if cached is not None:
+            results, age = cached
+            if age < self.ttl:
+                return results
+            if age < self.max_stale:
+                self._revalidate(key, fetch, results, on_update)
+                return results
+        return await self._fetch(key, load or fetch)
+
+    async def _fetch(self, key: tuple, fetch: Callable[[], Awaitable[list]]) -> list:
+        """Один запрос на ключ: повторный вызов ждёт уже идущую загрузку."""
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._run(key, fetch))
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f: self._forget(key, f))
+        # Счётчик — по самой загрузке, а не по ключу: _forget() срабатывает
+        # раньше ожидающих, и новая загрузка того же ключа считается отдельно
+        self._waiters[fut] = self._waiters.get(fut, 0) + 1
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            if self._waiters[fut] == 1:
+                fut.cancel()   # больше никому не нужно
+            raise
+        finally:
+            self._waiters[fut] -= 1
+            if not self._waiters[fut]:
+                del self._waiters[fut]
+
+    def _forget(self, key: tuple, fut: asyncio.Future):
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+
+    async def _run(self, key: tuple, fetch: Callable[[], Awaitable[list]]) -> list:
+        try:
+            results = await fetch()
+        except PartialResults as e:
+            print(f"[QueryCache] {key[1]!r}: выдача оборвалась ({e}) — не кэширую")
+            return e.results
+        self.store(key, results)
+        return results
+
+    def _revalidate(self, key: tuple, fetch, stale: list,
+                    on_update: Callable[[list], None] | None):
+        async def refresh():
+            try:
+                fresh = await self._fetch(key, fetch)
+            except Exception as e:
+                print(f"[QueryCache] Фоновое обновление {key[1]!r}: {e}")
+                return
+            # Оборванная выдача не сохраняется — и устаревшую не заменяет
+            stored = self._memory.get(key)
+            if stored is None or stored[0] is not fresh:
+                return
+            if fresh != stale and on_update:
+                on_update(fresh)
+        asyncio.ensure_future(refresh())
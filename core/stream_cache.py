@@ -0,0 +1,78 @@
+# core/stream_cache.py
+"""
+Кэш прямых ссылок на потоки по (video_id, формат).
+
+Ссылки googlevideo подписаны и живут до времени из параметра expire=
+(обычно ~6 часов); запись считается живой до expire минус запас.
+Вместе с ссылкой хранятся метаданные формата (размер, fps, длительность) —
+плеер берёт их отсюда и не запускает ffprobe.
+403 от сервера (ссылка отозвана раньше срока, сменился IP) — повод
+вызвать invalidate(): следующий запрос пойдёт в yt-dlp заново.
+
+Только в памяти: ссылки привязаны к IP и после перезапуска ненадёжны.
+"""
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+_EXPIRE_PATH = re.compile(r"/expire/(\d+)")
+
+
+def stream_expiry(url: str) -> float | None:
+    """Unix-время из expire= (в query или в пути /expire/N/), иначе None."""
+    parts = urlsplit(url)
+    values = parse_qs(parts.query).get("expire")
+    if values and values[0].isdigit():
+        return float(values[0])
+    m = _EXPIRE_PATH.search(parts.path)
+    return float(m.group(1)) if m else None
+
+
+class StreamCache:
+    # Запас до expire: ffmpeg может переподключаться посреди просмотра
+    SAFETY_MARGIN = 10 * 60
+    # Если expire в ссылке нет — сколько верить ей
+    DEFAULT_TTL = 30 * 60
+    MAX_ENTRIES = 128
+
+    def __init__(self):
+        self._entries: OrderedDict[tuple[str, str], tuple[dict, float]] = OrderedDict()
+
+    def get(self, video_id: str, fmt: str) -> dict | None:
+        key = (video_id, fmt)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        info, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return info
+
+    def put(self, video_id: str, fmt: str, info: dict):
+        url = info.get("url")
+        if not url:
+            return
+        expire = stream_expiry(url)
+        if expire is None:
+            expires_at = time.time() + self.DEFAULT_TTL
+        else:
+            expires_at = expire - self.SAFETY_MARGIN
+            if expires_at <= time.time():
+                return
+        key = (video_id, fmt)
+        self._entries[key] = (info, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, video_id: str, fmt: str | None = None):
+        """Забывает ссылку на формат или, без fmt, все форматы видео."""
+        for key in [k for k in self._entries
+                    if k[0] == video_id and (fmt is None or k[1] == fmt)]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
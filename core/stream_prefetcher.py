@@ -0,0 +1,97 @@
+# core/stream_prefetcher.py
+"""
+Упреждающее получение ссылок на потоки.
+
+Пока пользователь выбирает, ссылка и метаданные формата для вероятного
+клика уже оказываются в кэше ссылок плагина (plugin.get_stream_info) —
+клик не ждёт ни yt-dlp, ни ffprobe.
+
+  • наведение на карточку дольше HOVER_DELAY — в начало очереди
+  • первые VISIBLE_LIMIT видимых карточек, если экран простоял DWELL_DELAY
+  • max_concurrent извлечений одновременно (по умолчанию одно — второй
+    воркер yt-dlp остаётся свободным для клика и поиска)
+  • ушедшие с экрана карточки снимаются с очереди; уже начатое
+    извлечение доводится до конца — отмена убила бы тёплый воркер,
+    а результат всё равно пригодится в кэше
+"""
+import asyncio
+
+
+class StreamPrefetcher:
+    HOVER_DELAY = 0.2
+    DWELL_DELAY = 1.5
+    VISIBLE_LIMIT = 4
+
+    def __init__(self, max_concurrent: int = 1):
+        self.max_concurrent = max_concurrent
+        self.plugin = None
+        # plugin_for(item) — источник карточки в федеративной выдаче;
+        # None или пустой ответ — self.plugin
+        self.plugin_for = None
+        self._queue: list[dict] = []
+        self._running: dict[str, asyncio.Task] = {}
+        self._hovered: str | None = None
+        self._visible: list[dict] = []
+        self._hover_handle: asyncio.TimerHandle | None = None
+        self._dwell_handle: asyncio.TimerHandle | None = None
+
+    def set_plugin(self, plugin):
+        self.plugin = plugin
+        self._queue = []
+
+    def _plugin(self, item: dict):
+        return (self.plugin_for(item) if self.plugin_for else None) or self.plugin
+
+    # ── Сигналы интереса ──────────────────────────────────────────────────────
+
+    def hover(self, item: dict):
+        """Курсор над карточкой: если задержится — извлекаем первой."""
+        if self._hover_handle:
+            self._hover_handle.cancel()
+        self._hovered = item.get("id")
+        self._hover_handle = asyncio.get_event_loop().call_later(
+            self.HOVER_DELAY, self._enqueue, [item], True)
+
+    def set_visible(self, items: list[dict]):
+        """Видимые карточки по порядку; берутся в работу, если экран простоит."""
+        self._visible = items[:self.VISIBLE_LIMIT]
+        wanted = {item.get("id") for item in self._visible} | {self._hovered}
+        self._queue = [item for item in self._queue if item["id"] in wanted]
+        if self._dwell_handle:
+            self._dwell_handle.cancel()
+        self._dwell_handle = asyncio.get_event_loop().call_later(
+            self.DWELL_DELAY, self._enqueue, list(self._visible), False)
+
+    # ── Очередь ───────────────────────────────────────────────────────────────
+
+    def _is_cached(self, item: dict) -> bool:
+        return self._plugin(item).cached_stream(item["id"]) is not None
+
+    def _enqueue(self, items: list[dict], front: bool):
+        if self.plugin is None:
+            return
+        fresh = [item for item in items
+                 if item.get("id") and item["id"] not in self._running
+                 and not self._is_cached(item)]
+        fresh_ids = {item["id"] for item in fresh}
+        rest = [item for item in self._queue if item["id"] not in fresh_ids]
+        self._queue = fresh + rest if front else rest + fresh
+        self._pump()
+
+    def _pump(self):
+        while self._queue and len(self._running) < self.max_concurrent:
+            item = self._queue.pop(0)
+            video_id = item["id"]
+            if video_id in self._running or self._is_cached(item):
+                continue
+            self._running[video_id] = asyncio.ensure_future(self._run(item))
+
+    async def _run(self, item: dict):
+        video_id = item["id"]
+        try:
+            await self._plugin(item).get_stream_info(video_id)
+        except Exception as e:
+            print(f"[Prefetch] {video_id}: {type(e).__name__}: {e}")
+        finally:
+            self._running.pop(video_id, None)
+            self._pump()
@@ -0,0 +1,285 @@
+# core/ytdlp_pool.py
+"""
+Пул тёплых воркеров yt-dlp (см. core/ytdlp_worker.py).
+
+Каждый воркер — отдельный процесс Python с уже импортированным yt_dlp,
+общение JSON-строками через stdin/stdout с id запроса. Один воркер
+обрабатывает один запрос за раз; свободные ждут в очереди.
+
+  • таймаут запроса — воркер убивается и перезапускается
+  • падение процесса — все его запросы получают YtDlpError, воркер
+    перезапускается в фоне
+  • отмена запроса (например, устаревший поиск) тоже убивает воркер:
+    внутри yt-dlp запрос не прервать, а занятый слот нужен сейчас
+
+Если пул поднять не удалось (нет интерпретатора в frozen-сборке, yt_dlp
+не импортируется), call() сразу бросает YtDlpError — плагин откатывается
+на старый путь через CLI.
+
+При выходе приложения воркеры завершаются сами: stdin закрывается,
+цикл чтения в воркере заканчивается.
+"""
+import os
+import sys
+import json
+import asyncio
+import itertools
+import subprocess
+from typing import Any, Callable
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ytdlp_worker.py")
+# Ответ поиска — одна JSON-строка; лимит StreamReader по умолчанию 64 КБ
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class YtDlpError(Exception):
+    pass
+
+
+class YtDlpWorkerDied(YtDlpError):
+    """Процесс воркера закрыл stdout — ответа не будет, воркер на замену."""
+
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.proc: asyncio.subprocess.Process | None = None
+        self._ids = itertools.count(1)
+        self._requests: dict[int, tuple[asyncio.Future, Callable | None]] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def start(self):
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=_LINE_LIMIT,
+            **kwargs
+        )
+        # У каждого процесса свои читатели и свои запросы: читатель умершего
+        # процесса после перезапуска не должен трогать запросы нового
+        requests: dict[int, tuple[asyncio.Future, Callable | None]] = {}
+        self.proc, self._requests = proc, requests
+        self._tasks = [asyncio.create_task(self._read_stdout(proc, requests)),
+                       asyncio.create_task(self._drain_stderr(proc))]
+
+    async def request(self, method: str, params: dict,
+                      on_item: Callable[[Any], None] | None = None) -> Any:
+        if not self.alive:
+            raise YtDlpWorkerDied("воркер не запущен")
+        req_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        proc, requests = self.proc, self._requests
+        requests[req_id] = (fut, on_item)
+        line = json.dumps({"id": req_id, "method": method, "params": params},
+                          ensure_ascii=False) + "\n"
+        try:
+            proc.stdin.write(line.encode("utf-8"))
+            await proc.stdin.drain()
+            return await fut
+        finally:
+            requests.pop(req_id, None)
+
+    async def _read_stdout(self, proc: asyncio.subprocess.Process, requests: dict):
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                fut, on_item = requests.get(msg.get("id"), (None, None))
+                if fut is None or fut.done():
+                    continue
+                if "item" in msg:
+                    if on_item:
+                        on_item(msg["item"])
+                elif msg.get("ok"):
+                    fut.set_result(msg.get("result"))
+                else:
+                    fut.set_exception(YtDlpError(msg.get("error", "unknown error")))
+        finally:
+            # Процесс умер — никто из ждущих ответа уже не получит
+            for fut, _ in list(requests.values()):
+                if not fut.done():
+                    fut.set_exception(YtDlpWorkerDied(f"воркер #{self.index} завершился"))
+
+    async def _drain_stderr(self, proc: asyncio.subprocess.Process):
+        # Не вычитывать stderr нельзя — заполненный буфер заблокирует воркер
+        while True:
+            line = await proc.stderr.readline()
+            if not line:
+                break
+            text = line.decode(errors="replace").rstrip()
+            if text:
+                print(f"[yt-dlp #{self.index}] {text}")
+
+    def kill(self):
+        if self.alive:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+
+
+class YtDlpPool:
+    # Прогрев (импорт yt_dlp в воркере) — заметно меньше таймаута
+    # initialize() плагина (PluginManager.INIT_TIMEOUT), чтобы пул успел
+    # сам сообщить о неудаче, а не был отменён посреди запуска
+    WARMUP_TIMEOUT = 10.0
+
+    def __init__(self, size: int = 2, timeout: float = 30.0):
+        self.size = size
+        self.timeout = timeout
+        self.failed = False
+        self._idle: asyncio.Queue | None = None
+        self._workers: list[_Worker] = []
+        self._start_lock: asyncio.Lock | None = None
+        self.version = ""
+
+    @property
+    def usable(self) -> bool:
+        # В frozen-сборке sys.executable — само приложение, а не python
+        return (not self.failed and not getattr(sys, "frozen", False)
+                and os.path.exists(WORKER_SCRIPT))
+
+    # ── Запуск ────────────────────────────────────────────────────────────────
+
+    async def start(self) -> bool:
+        """Поднимает и прогревает воркеры. False — пул недоступен."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._workers:
+                return not self.failed
+            if not self.usable:
+                self.failed = True
+                return False
+            self._idle = asyncio.Queue()
+            workers = [_Worker(i) for i in range(self.size)]
+            try:
+                await asyncio.gather(*(self._spawn(w) for w in workers))
+            except BaseException as e:
+                # В том числе отмена (таймаут initialize()): уже запущенные
+                # процессы иначе остались бы висеть
+                for w in workers:
+                    w.kill()
+                if not isinstance(e, Exception):
+                    raise
+                print(f"[yt-dlp pool] Не удалось запустить воркеры: {e}")
+                self.failed = True
+                return False
+            self._workers = workers
+            for w in workers:
+                self._idle.put_nowait(w)
+            print(f"[yt-dlp pool] {self.size} воркер(а) готовы, yt-dlp {self.version}")
+            return True
+
+    async def _spawn(self, worker: _Worker):
+        await worker.start()
+        # ping дожидается импорта yt_dlp — воркер возвращается уже тёплым
+        result = await asyncio.wait_for(worker.request("ping", {}),
+                                        min(self.timeout, self.WARMUP_TIMEOUT))
+        self.version = result.get("version", "")
+
+    async def _respawn(self, worker: _Worker):
+        worker.kill()
+        try:
+            await self._spawn(worker)
+        except Exception as e:
+            print(f"[yt-dlp pool] Перезапуск воркера #{worker.index} не удался: {e}")
+            worker.kill()
+            if not any(w.alive for w in self._workers):
+                self.failed = True
+            return
+        self._idle.put_nowait(worker)
+
+    # ── Запросы ───────────────────────────────────────────────────────────────
+
+    async def call(self, method: str, params: dict, timeout: float | None = None,
+                   on_item: Callable[[Any], None] | None = None) -> Any:
+        """
+        Выполняет метод в свободном воркере. on_item получает промежуточные
+        элементы потоковых методов. Ошибки воркера и таймауты — YtDlpError.
+        """
+        if not await self.start():
+            raise YtDlpError("пул yt-dlp недоступен")
+        timeout = timeout or self.timeout
+        try:
+            worker = await asyncio.wait_for(self._acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise YtDlpError("нет свободного воркера") from None
+
+        healthy = False
+        try:
+            result = await asyncio.wait_for(
+                worker.request(method, params, on_item), timeout)
+            healthy = True
+            return result
+        except asyncio.TimeoutError:
+            raise YtDlpError(f"таймаут {method} ({timeout:g} с)") from None
+        except YtDlpWorkerDied:
+            # returncode на этот момент может быть ещё не выставлен —
+            # alive соврёт, поэтому смотрим на сам тип ошибки
+            raise
+        except YtDlpError:
+            healthy = True   # ok: false от воркера — ошибка экстрактора, процесс жив
+            raise
+        finally:
+            if healthy:
+                self._idle.put_nowait(worker)
+            else:
+                # Таймаут, падение или отмена: процесс занят/мёртв — заменяем
+                asyncio.get_running_loop().create_task(self._respawn(worker))
+
+    async def _acquire(self) -> _Worker:
+        """Свободный живой воркер; умерший в очереди уходит на перезапуск."""
+        while True:
+            worker = await self._idle.get()
+            if worker.alive:
+                return worker
+            asyncio.get_running_loop().create_task(self._respawn(worker))
+
+    async def stream(self, method: str, params: dict, timeout: float | None = None):
+        """
+        Async-генератор по элементам потокового метода. Ошибка запроса
+        поднимается после уже выданных элементов; прерванный перебор
+        отменяет запрос (и перезапускает воркер).
+        """
+        items: asyncio.Queue = asyncio.Queue()
+        done = object()
+        task = asyncio.ensure_future(
+            self.call(method, params, timeout, on_item=items.put_nowait))
+        task.add_done_callback(lambda _t: items.put_nowait(done))
+        try:
+            while True:
+                item = await items.get()
+                if item is done:
+                    break
+                yield item
+            task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def close(self):
+        workers, self._workers = self._workers, []
+        for w in workers:
+            w.kill()
+        # Дожидаемся завершения, чтобы процессы не пережили цикл событий
+        for w in workers:
+            if w.proc is not None:
+                try:
+                    await asyncio.wait_for(w.proc.wait(), 5)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,117 @@
+# core/ytdlp_worker.py
+"""
+Долгоживущий воркер yt-dlp. Запускается YtDlpPool как отдельный процесс:
+
+    python ytdlp_worker.py
+
+Протокол — JSON по строке в stdin/stdout:
+    → {"id": 1, "method": "search", "params": {...}}
+    ← {"id": 1, "ok": true, "result": ...}
+    ← {"id": 1, "ok": false, "error": "..."}
+Потоковые методы до финального ответа шлют {"id": 1, "item": {...}}.
+
+yt_dlp импортируется один раз при старте, экземпляры YoutubeDL
+переиспользуются между запросами — интерпретатор и экстракторы уже тёплые.
+"""
+import sys
+import json
+import itertools
+import traceback
+
+import yt_dlp
+
+_ydl_cache: dict[str, "yt_dlp.YoutubeDL"] = {}
+_out = sys.stdout   # канал протокола; всё остальное, что печатается, уходит в stderr
+
+
+def _ydl(**opts) -> "yt_dlp.YoutubeDL":
+    key = json.dumps(opts, sort_keys=True)
+    ydl = _ydl_cache.get(key)
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True,
+                                "skip_download": True, **opts})
+        _ydl_cache[key] = ydl
+    return ydl
+
+
+def _send(msg: dict):
+    _out.write(json.dumps(msg, ensure_ascii=False) + "\n")
+    _out.flush()
+
+
+# ── Методы ────────────────────────────────────────────────────────────────────
+
+def m_ping(params: dict, emit) -> dict:
+    return {"version": yt_dlp.version.__version__}
+
+
+def m_search(params: dict, emit) -> dict:
+    """
+    Плоский поиск: params = {query, start, count}. Записи уходят через emit
+    по мере разбора страниц выдачи (process=False оставляет entries
+    ленивым генератором), в ответе — только их число.
+    Первые start записей пропускаются без сериализации: продолжения выдачи
+    YouTube всё равно идут по порядку, но уже отданное не пересылается.
+    """
+    query = params["query"]
+    start, count = int(params.get("start", 0)), int(params.get("count", 20))
+    ydl = _ydl(extract_flat="in_playlist")
+    info = ydl.extract_info(f"ytsearch{start + count}:{query}",
+                            download=False, process=False)
+    n = 0
+    for e in itertools.islice(info.get("entries") or [], start, start + count):
+        if e:
+            emit(ydl.sanitize_info(e))
+            n += 1
+    return {"count": n}
+
+
+def m_extract(params: dict, emit) -> dict:
+    """Прямая ссылка на поток: params = {url, format}."""
+    ydl = _ydl(format=params.get("format", "best[ext=mp4]/best"))
+    info = ydl.extract_info(params["url"], download=False)
+    return {
+        "url":          info.get("url", ""),
+        "format_id":    info.get("format_id", ""),
+        "ext":          info.get("ext", ""),
+        "width":        info.get("width") or 0,
+        "height":       info.get("height") or 0,
+        "fps":          info.get("fps") or 0,
+        "duration":     info.get("duration") or 0,
+        "http_headers": info.get("http_headers") or {},
+    }
+
+
+METHODS = {
+    "ping":    m_ping,
+    "search":  m_search,
+    "extract": m_extract,
+}
+
+
+def main():
+    global _out
+    # На Windows консольная кодировка не UTF-8 — запросы с кириллицей ломаются
+    sys.stdin.reconfigure(encoding="utf-8")
+    sys.stdout.reconfigure(encoding="utf-8")
+    _out = sys.stdout
+    sys.stdout = sys.stderr
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        req_id = None
+        try:
+            req = json.loads(line)
+            req_id = req.get("id")
+            method = METHODS[req["method"]]
+            emit = lambda item, _id=req_id: _send({"id": _id, "item": item})
+            _send({"id": req_id, "ok": True,
+                   "result": method(req.get("params") or {}, emit)})
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            _send({"id": req_id, "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+
+if __name__ == "__main__":
+    main()
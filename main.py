@@ -1,12 +1,15 @@
 import sys
 import asyncio
+import bisect
+import math
 import os
 
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QLineEdit, QPushButton, QListWidget, QLabel,
-                             QListWidgetItem, QStackedWidget, QFrame, QSizePolicy)
-from PyQt5.QtCore import Qt, QFileSystemWatcher, QSize
-from PyQt5.QtGui import QFontDatabase
+                             QListWidgetItem, QStackedWidget, QFrame, QSizePolicy,
+                             QShortcut)
+from PyQt5.QtCore import Qt, QFileSystemWatcher, QSize, QTimer
+from PyQt5.QtGui import QFontDatabase, QKeySequence
 
 os.environ["PATH"] = os.path.dirname(os.path.abspath(__file__)) + os.pathsep + os.environ["PATH"]
 
@@ -14,13 +17,22 @@ from qasync import QEventLoop
 from qframelesswindow import FramelessMainWindow
 from core.plugin_manager import PluginManager
 from core.database import Database
+from core.query_cache import QueryCache
+from core.interfaces import PartialResults, collect
+from core.federated import FederatedSearch
+from core.enrichment import EnrichmentPipeline
+from core.stream_prefetcher import StreamPrefetcher
 from ui.delegates import VideoDelegate
 from core.cache_manager import CacheManager
 from ui.video_player import NativePlayer
 from ui.titlebar import CustomTitleBar
 from ui.sidebar import Sidebar
+from ui.video_grid import VideoGrid
+from ui.debug_panel import CacheDebugPanel
 
 TITLEBAR_HEIGHT = 40
+# Для скольких верхних видимых карточек заранее грузить похожие
+RELATED_PREFETCH = 3
 
 class MainWindow(FramelessMainWindow):
     def __init__(self):
@@ -33,6 +45,8 @@ class MainWindow(FramelessMainWindow):
         self.setTitleBar(self.custom_title_bar)
         self.custom_title_bar.sidebar_toggle.connect(self._toggle_sidebar)
         self.custom_title_bar.search_requested.connect(self._on_titlebar_search)
+        self.custom_title_bar.search_typed.connect(self._on_typed_search)
+        self.custom_title_bar.query_edited.connect(self._update_suggestions)
 
         if sys.platform == "win32":
             try:
@@ -44,14 +58,33 @@ class MainWindow(FramelessMainWindow):
                 pass
 
         self.db = Database()
+        self.query_cache = QueryCache(self.db)
+        self._feed = None       # лента, которая сейчас в сетке
+        self._feed_tasks: set = set()   # загрузка первой страницы ленты
+        self._grid_rows: dict[str, int] = {}   # id видео -> строка сетки
+        self._grid_keys: list[tuple] = []       # ранг карточки в каждой строке
+        self._playing_id = None
+        self._playing_plugin = None   # источник открытого видео
+        self._stream_retried = False   # повтор после 403 — один на клик
         self.cache = CacheManager()
+        self.enrichment = EnrichmentPipeline()
+        self.enrichment.enriched.connect(self._on_item_enriched)
+        self.stream_prefetcher = StreamPrefetcher()
+        # Карточки федеративной выдачи дозаполняет и извлекает их источник
+        self.enrichment.plugin_for = self._plugin_for
+        self.stream_prefetcher.plugin_for = self._plugin_for
+        # Только манифесты — модули плагинов импортируются уже после show()
         self.plugin_manager = PluginManager()
+        self.plugin_manager.set_services(self.db, self.cache)
         self.plugin_manager.load_plugins()
 
         self.setup_ui()
         self.setup_styles()
         self.custom_title_bar.raise_()
 
+        self.debug_panel = None
+        QShortcut(QKeySequence("F12"), self, activated=self._toggle_debug_panel)
+
     # ── Window controls ───────────────────────────────────────────────────────
 
     def changeEvent(self, event):
@@ -63,6 +96,15 @@ class MainWindow(FramelessMainWindow):
     def _toggle_sidebar(self):
         self.sidebar.toggle()
 
+    def _toggle_debug_panel(self):
+        if self.debug_panel is None:
+            self.debug_panel = CacheDebugPanel(self.cache, self)
+        self.debug_panel.setVisible(not self.debug_panel.isVisible())
+
+    def closeEvent(self, event):
+        self.cache.flush()
+        super().closeEvent(event)
+
     # ── UI Setup ──────────────────────────────────────────────────────────────
 
     def setup_ui(self):
@@ -96,7 +138,7 @@ class MainWindow(FramelessMainWindow):
         right_layout.addWidget(self.content_stack, stretch=1)
 
         # Video grid
-        self.video_list = QListWidget()
+        self.video_list = VideoGrid()
         self.video_list.setObjectName("videoList")
         self.video_list.setViewMode(QListWidget.IconMode)
         self.video_list.setResizeMode(QListWidget.Adjust)
@@ -104,7 +146,22 @@ class MainWindow(FramelessMainWindow):
         self.video_list.setMovement(QListWidget.Static)
         self.video_list.setFocusPolicy(Qt.NoFocus)
         self.video_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.video_list.setItemDelegate(VideoDelegate(self.cache, self.video_list))
+        self.video_delegate = VideoDelegate(self.cache, self.video_list)
+        self.video_list.setItemDelegate(self.video_delegate)
+        self.video_list.model().rowsInserted.connect(self.video_delegate.on_rows_inserted)
+        self.video_list.visible_range_changed.connect(self.video_delegate.set_visible_range)
+        self.video_list.near_end.connect(self._on_grid_near_end)
+        self.video_list.visible_range_changed.connect(self._enrich_visible)
+        self.video_list.visible_range_changed.connect(self._speculate_visible)
+        # itemEntered приходит только с отслеживанием мыши
+        self.video_list.setMouseTracking(True)
+        self.video_list.itemEntered.connect(self._on_card_hovered)
+        # Похожие для верхних карточек — когда прокрутка остановилась
+        self._related_timer = QTimer(self)
+        self._related_timer.setSingleShot(True)
+        self._related_timer.setInterval(800)
+        self._related_timer.timeout.connect(self._prefetch_related)
+        self.video_list.visible_range_changed.connect(lambda *_: self._related_timer.start())
         self.video_list.itemClicked.connect(self.on_video_clicked)
         self.video_list.setStyleSheet("""
             /* Сама дорожка (невидимая зона) */
@@ -144,8 +201,9 @@ class MainWindow(FramelessMainWindow):
 
         # Player
         try:
-            self.player = NativePlayer()
+            self.player = NativePlayer(self.cache)
             self.player.back_btn.clicked.connect(self.show_list)
+            self.player.stream_expired.connect(self._on_stream_expired)
         except Exception as e:
             print(f"Player init error: {e}")
             self.player = QFrame()
@@ -179,9 +237,9 @@ class MainWindow(FramelessMainWindow):
             'movies': 'movies',
         }
         if key in ('home', 'trending'):
-            asyncio.create_task(self.load_trending())
+            self._start_feed(self.load_trending())
         elif key in search_map:
-            asyncio.create_task(self.perform_search(search_map[key]))
+            self._start_feed(self.perform_search(search_map[key]))
         self.show_list()
 
     # ── Video interaction ─────────────────────────────────────────────────────
@@ -189,42 +247,96 @@ class MainWindow(FramelessMainWindow):
     def on_video_clicked(self, item):
         data = item.data(Qt.UserRole)
         v_id = data.get('id')
+        # Запрос, из выдачи которого что-то открыли, — в историю для подсказок
+        if self._feed and not self._feed.query.startswith(":"):
+            self.db.add_search_history(self._feed.query)
         self.content_stack.setCurrentIndex(1)
 
         # Передаём метаданные в плеер сразу
         if hasattr(self.player, 'set_video_info'):
             self.player.set_video_info(data)
 
+        self._playing_id = v_id
+        self._playing_plugin = self._plugin_for(data)
+        self._stream_retried = False
+        if hasattr(self.player, 'set_related'):
+            # Предзагруженные похожие показываем сразу, без ожидания
+            plugin = self._playing_plugin
+            self.player.set_related(plugin.cached_related(v_id) or [])
         asyncio.create_task(self.resolve_and_play(v_id, data))
 
     async def resolve_and_play(self, v_id: str, data: dict):
+        # Параллельно: получаем стрим и загружаем похожие — кто первый, тот и показан
+        asyncio.create_task(self._load_related(v_id, data))
         try:
-            # Параллельно: получаем стрим и загружаем похожие
-            stream_task   = asyncio.create_task(
-                self.plugin_manager.active_plugin.get_stream_url(v_id)
-            )
-            related_task  = asyncio.create_task(
-                self.plugin_manager.active_plugin.search(
-                    data.get('title', '')[:40]
-                )
-            )
-
-            stream_url = await stream_task
-            if stream_url and hasattr(self.player, 'play_raw_url'):
-                self.player.play_raw_url(stream_url)
+            stream = await self._plugin_for(data).get_stream_info(v_id)
+            if stream.get('url') and hasattr(self.player, 'play_raw_url'):
+                self.player.play_raw_url(stream['url'], stream)
             else:
                 print("Ошибка: не удалось получить поток")
+        except Exception as e:
+            print(f"[Player] {e}")
+
+    async def _load_related(self, v_id: str, data: dict):
+        plugin = self._plugin_for(data)
+        if plugin.cached_related(v_id) is not None:
+            return   # уже показаны в on_video_clicked
+        try:
+            related = await plugin.get_related(v_id, data.get('title', ''))
+        except Exception as e:
+            print(f"[Related] {e}")
+            return
+        if self._playing_id == v_id and hasattr(self.player, 'set_related'):
+            self.player.set_related(related)
 
-            related = await related_task
-            # Убираем само видео из похожих
-            related = [r for r in related if r.get('id') != v_id]
-            if hasattr(self.player, 'set_related'):
-                self.player.set_related(related)
+    def _prefetch_related(self):
+        """Похожие для верхних видимых карточек — клик по ним откроет плеер сразу с ними."""
+        first, last = self.video_list.visible_range()
+        if first < 0:
+            return
+        for row in range(first, min(last, first + RELATED_PREFETCH - 1) + 1):
+            data = self.video_list.item(row).data(Qt.UserRole) or {}
+            v_id = data.get('id')
+            # Кэш похожих — у источника карточки: его же спросит клик
+            plugin = self._plugin_for(data)
+            if v_id and plugin and plugin.cached_related(v_id) is None:
+                asyncio.ensure_future(self._prefetch_one(plugin, v_id, data.get('title', '')))
+
+    async def _prefetch_one(self, plugin, v_id: str, title: str):
+        try:
+            await plugin.get_related(v_id, title)
+        except Exception as e:
+            print(f"[Related] Предзагрузка {v_id}: {e}")
 
+    def _on_stream_expired(self):
+        """403 на ссылке из кэша: забываем её и один раз получаем свежую."""
+        v_id = self._playing_id
+        plugin = self._playing_plugin
+        if not v_id or not plugin:
+            return
+        plugin.invalidate_stream(v_id)
+        if self._stream_retried:
+            print("[Player] Поток снова вернул 403")
+            return
+        self._stream_retried = True
+        asyncio.create_task(self._replay_fresh(v_id))
+
+    async def _replay_fresh(self, v_id: str):
+        try:
+            stream = await self._playing_plugin.get_stream_info(v_id)
         except Exception as e:
             print(f"[Player] {e}")
+            return
+        if stream.get('url') and self._playing_id == v_id:
+            self.player.play_raw_url(stream['url'], stream, resume=True)
+
+    def _plugin_for(self, data: dict):
+        """Плагин, из выдачи которого карточка (федеративный поиск), иначе активный."""
+        return (self.plugin_manager.plugins.get(data.get('source'))
+                or self.plugin_manager.active_plugin)
 
     def show_list(self):
+        self._playing_id = None
         if hasattr(self.player, 'stop'):
             self.player.stop()
         self.content_stack.setCurrentIndex(0)
@@ -253,46 +365,276 @@ class MainWindow(FramelessMainWindow):
     # ── Plugin & data ─────────────────────────────────────────────────────────
 
     async def init_plugins(self):
+        # Все плагины грузятся параллельно; активный ждём только свой
+        asyncio.ensure_future(self.plugin_manager.initialize_all())
         try:
             await self.plugin_manager.set_active_plugin("Invidious")
-            await self.load_trending()
+            self.enrichment.set_plugin(self.plugin_manager.active_plugin)
+            self.stream_prefetcher.set_plugin(self.plugin_manager.active_plugin)
+            thumb = self.video_delegate.thumb_size()
+            self.plugin_manager.active_plugin.set_thumbnail_hint(
+                thumb.width(), thumb.height(), self.devicePixelRatioF())
+            self._start_feed(self.load_trending())
         except Exception as e:
             print(f"Ошибка: {e}")
 
     def _on_titlebar_search(self, query: str):
         """Поиск из тайтлбара."""
-        asyncio.create_task(self.perform_search(query))
+        self.db.add_search_history(query)
+        # Enter после набора: тот же запрос уже грузится (или показан) —
+        # перезапуск отменил бы ленту, в которую стримится выдача
+        feed = self._feed
+        if feed and feed.query == query and (feed.loading or self._grid_rows):
+            return
+        self._start_feed(self.perform_search(query))
+
+    def _on_typed_search(self, query: str):
+        """Поиск по мере набора (после паузы) — только если открыта сетка."""
+        if self.content_stack.currentIndex() != 0:
+            return
+        if self._feed and self._feed.query == query:
+            return
+        self._start_feed(self.perform_search(query))
 
     def on_search(self):
         query = self.custom_title_bar.search_input.text().strip()
         if query:
-            asyncio.create_task(self.perform_search(query))
+            self._on_titlebar_search(query)
+
+    def _update_suggestions(self, text: str):
+        text = text.strip()
+        source = self._search_source()
+        if not text or not source:
+            self.custom_title_bar.set_suggestions([])
+            return
+        items = self.db.search_history(text)
+        # Тот же ключ, под которым perform_search кэширует выдачу
+        for query in self.query_cache.known_queries(source.name, text):
+            if query not in items:
+                items.append(query)
+        self.custom_title_bar.set_suggestions(items[:8])
+
+    def _start_feed(self, coro):
+        """
+        Запускает загрузку новой ленты, отменяя предыдущую вместе с её
+        подгрузкой страниц: устаревший поиск не должен ни занимать yt-dlp,
+        ни перезаписать сетку. Применяется только последняя лента (_feed).
+        """
+        if self._feed is not None:
+            self._feed.cancel()
+        task = asyncio.ensure_future(coro)
+        self._feed_tasks.add(task)
+        task.add_done_callback(self._feed_tasks.discard)
+        for old in list(self._feed_tasks):
+            if old is not task:
+                old.cancel()
+
+    def _search_source(self):
+        """Несколько готовых плагинов — спрашиваем все сразу, иначе активный."""
+        sources = self.plugin_manager.ready_plugins()
+        if len(sources) > 1:
+            return FederatedSearch(sources)
+        return self.plugin_manager.active_plugin
 
     async def perform_search(self, query: str):
-        if not self.plugin_manager.active_plugin:
+        source = self._search_source()
+        if not source:
             return
         try:
-            results = await self.plugin_manager.active_plugin.search(query)
-            self.update_video_list(results)
+            await self._open_feed(source.name, query,
+                                  lambda page: source.search_stream(query, page))
         except Exception as e:
             print(f"Ошибка: {e}")
 
     async def load_trending(self):
-        if not self.plugin_manager.active_plugin:
+        plugin = self.plugin_manager.active_plugin
+        if not plugin:
             return
         try:
-            results = await self.plugin_manager.active_plugin.get_trending()
-            self.update_video_list(results)
+            await self._open_feed(plugin.name, ":trending", plugin.trending_stream)
         except Exception as e:
             print(f"Ошибка трендов: {e}")
 
-    def update_video_list(self, items):
+    # ── Лента с подгрузкой страниц ────────────────────────────────────────────
+
+    async def _open_feed(self, plugin_name: str, query: str, pages):
+        """
+        Новая лента в сетке. pages(n) — async-генератор n-й страницы.
+        Страница 0 идёт через QueryCache: при промахе карточки добавляются
+        по мере прихода, устаревшая выдача подменяется после фонового
+        обновления (если дальше первой страницы ещё не листали).
+        Следующие страницы — _load_next_page() по near_end сетки.
+        """
+        feed = _Feed(plugin_name, query, pages)
+        self._feed = feed
+        key = QueryCache.make_key(plugin_name, query)
+
+        def on_update(fresh):
+            if self._feed is feed and feed.page == 0:
+                self.update_video_list(fresh, keep_scroll=True)
+
+        feed.loading = True
+        try:
+            results = await self.query_cache.get(
+                key, lambda: collect(pages(0)), on_update,
+                lambda: self._stream_into_grid(feed, pages(0), replace=True))
+        finally:
+            feed.loading = False
+        if self._feed is feed:
+            if results is not feed.streamed or not results:
+                self.update_video_list(results)
+            feed.done = not results
+            self.video_list.refresh_visible_range()
+
+    def _on_grid_near_end(self):
+        feed = self._feed
+        if feed and not feed.loading and not feed.done:
+            feed.track(asyncio.ensure_future(self._load_next_page(feed)))
+
+    async def _load_next_page(self, feed: "_Feed"):
+        page = feed.page + 1
+        key = QueryCache.make_key(feed.plugin, feed.query, page)
+        feed.loading = True
+        try:
+            results = await self.query_cache.get(
+                key, lambda: collect(feed.pages(page)), None,
+                lambda: self._stream_into_grid(feed, feed.pages(page)))
+        except Exception as e:
+            print(f"[Feed] Страница {page + 1}: {e}")
+            feed.done = True
+            return
+        finally:
+            feed.loading = False
+        if self._feed is not feed:
+            return
+        if results is not feed.streamed:
+            for item in results:
+                self.append_video(item)
+        feed.page = page
+        feed.done = not results
+        # Страница могла почти целиком оказаться дублями — проверяем ещё раз
+        self.video_list.refresh_visible_range()
+
+    async def _stream_into_grid(self, feed: "_Feed", items, replace=False) -> list:
+        """
+        Собирает результаты из async-генератора, добавляя карточки сразу.
+        replace — это первая страница: старая выдача остаётся на экране
+        до первого нового результата.
+        """
+        results = []
+        feed.streamed = results
+        try:
+            async for item in items:
+                if self._feed is feed:
+                    if replace and not results:
+                        self._clear_grid()
+                    self.append_video(item)
+                results.append(item)
+        except PartialResults as e:
+            # Показанное остаётся в сетке, но в кэш не попадёт
+            raise PartialResults(str(e), results) from None
+        return results
+
+    def _clear_grid(self):
         self.video_list.clear()
+        self._grid_rows = {}
+        self._grid_keys = []
+        self.enrichment.reset()
+
+    def update_video_list(self, items, keep_scroll=False):
+        scroll = self.video_list.verticalScrollBar().value()
+        self._clear_grid()
         for item in items:
-            li = QListWidgetItem()
-            li.setData(Qt.UserRole, item)
-            li.setSizeHint(QSize(320, 280))
-            self.video_list.addItem(li)
+            self.append_video(item)
+        if keep_scroll:
+            self.video_list.executeDelayedItemsLayout()
+            self.video_list.verticalScrollBar().setValue(scroll)
+
+    def append_video(self, item: dict):
+        # Выдача на соседних страницах пересекается — одно видео дважды не показываем
+        vid = item.get('id')
+        if vid and vid in self._grid_rows:
+            return
+        # Федеративная выдача ранжирована: карточка встаёт на своё место,
+        # а не в конец, — порядок не зависит от того, кто ответил быстрее
+        key = tuple(item['rank']) if item.get('rank') else (math.inf,)
+        row = bisect.bisect_right(self._grid_keys, key)
+        self._grid_keys.insert(row, key)
+        if row < len(self._grid_keys) - 1:
+            for other, r in self._grid_rows.items():
+                if r >= row:
+                    self._grid_rows[other] = r + 1
+        if vid:
+            self._grid_rows[vid] = row
+        li = QListWidgetItem()
+        li.setData(Qt.UserRole, item)
+        li.setSizeHint(QSize(320, 280))
+        self.video_list.insertItem(row, li)
+
+
+    # ── Дозаполнение карточек ─────────────────────────────────────────────────
+
+    def _enrich_visible(self, first: int, last: int):
+        """Видимые карточки — в начало очереди, ряд сверху и снизу — следом."""
+        if first < 0:
+            self.enrichment.set_window([])
+            return
+        per_row = self.video_list.items_per_row()
+        lo = max(0, first - per_row)
+        hi = min(self.video_list.count() - 1, last + per_row)
+        rows = list(range(first, last + 1))
+        rows += [r for r in range(lo, hi + 1) if r < first or r > last]
+        items = [self.video_list.item(r).data(Qt.UserRole) for r in rows]
+        self.enrichment.set_window([item for item in items if item])
+
+    def _on_item_enriched(self, video_id: str, fields: dict):
+        """Обновляет одну карточку — перерисуется только она."""
+        row = self._grid_rows.get(video_id)
+        li = self.video_list.item(row) if row is not None else None
+        if li is None:
+            return
+        data = dict(li.data(Qt.UserRole) or {})
+        data.update(fields)
+        li.setData(Qt.UserRole, data)
+
+    # ── Упреждающее получение ссылок ──────────────────────────────────────────
+
+    def _speculate_visible(self, first: int, last: int):
+        items = []
+        if first >= 0:
+            for row in range(first, last + 1):
+                data = self.video_list.item(row).data(Qt.UserRole) or {}
+                if data.get('id'):
+                    items.append(data)
+        self.stream_prefetcher.set_visible(items)
+
+    def _on_card_hovered(self, item):
+        data = item.data(Qt.UserRole) or {}
+        if data.get('id'):
+            self.stream_prefetcher.hover(data)
+
+
+class _Feed:
+    """Состояние ленты в сетке: запрос, загруженные страницы, подгрузка."""
+
+    def __init__(self, plugin: str, query: str, pages):
+        self.plugin = plugin
+        self.query = query
+        self.pages = pages          # page -> async-генератор результатов
+        self.page = 0               # последняя показанная страница
+        self.loading = False
+        self.done = False           # пустая страница — дальше нет
+        self.streamed = None        # список, который сейчас стримится в сетку
+        self._tasks: set = set()
+
+    def track(self, task: asyncio.Task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def cancel(self):
+        """Лента заменена — отменяем подгрузку её страниц."""
+        for task in list(self._tasks):
+            task.cancel()
 
 
 if __name__ == "__main__":
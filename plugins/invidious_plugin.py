@@ -1,10 +1,19 @@
 import asyncio
+import html
 import json
 import re
+import time
 import httpx
-import yt_dlp
-from core.interfaces import BasePlugin
-
+from core.interfaces import BasePlugin, PartialResults, collect
+from core.ytdlp_pool import YtDlpPool, YtDlpError
+from core.stream_cache import StreamCache
+
+# Читается PluginManager без импорта модуля (см. core/plugin_manager.py)
+PLUGIN_MANIFEST = {
+    "name": "Invidious",
+    "class": "InvidiousPlugin",
+    "description": "YouTube через yt-dlp и страницы youtube.com",
+}
 
 # Headers имитируют обычный браузер — без этого YouTube отдаёт пустую страницу
 _HEADERS = {
@@ -16,6 +25,91 @@ _HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+_STREAM_FORMAT = "best[ext=mp4]"
+
+# Аватарка и имя канала из <head> — задолго до ytInitialData
+_CHANNEL_PATTERNS = {
+    "avatar": re.compile(rb'<meta property="og:image" content="([^"]+)"'),
+    "name":   re.compile(rb'<meta property="og:title" content="([^"]*)"'),
+}
+# Точные просмотры и дата загрузки: микроразметка или начало ytInitialPlayerResponse
+_WATCH_PATTERNS = {
+    "view_count":  re.compile(rb'itemprop="interactionCount" content="(\d+)"'
+                              rb'|"viewCount":"(\d+)"'),
+    "upload_date": re.compile(rb'itemprop="(?:uploadDate|datePublished)" content="([^"]+)"'
+                              rb'|"(?:uploadDate|publishDate)":"([^"]+)"'),
+}
+_AVATAR_SIZE = re.compile(r"=s\d+-")
+_AVATAR_PX = 88
+# Больше страницы не читаем, даже если нужного не нашлось
+_PAGE_SCAN_LIMIT = 4 * 1024 * 1024
+# Сколько карточек помнить в кэше подробностей
+_DETAILS_MAX = 1000
+# Похожие видео: внутренний API страницы просмотра (то же, что грузит сайт)
+_NEXT_URL = "https://www.youtube.com/youtubei/v1/next?prettyPrint=false"
+_NEXT_CONTEXT = {"client": {"clientName": "WEB", "clientVersion": "2.20240101.00.00",
+                            "hl": "en", "gl": "US"}}
+_RELATED_TTL = 60 * 60
+_RELATED_MAX = 200
+_VIEWS_SUFFIX = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+# Через сколько перепроверять аватарку известного канала
+_CHANNEL_MAX_AGE = 30 * 24 * 3600
+
+# Варианты превью i.ytimg.com: имя и размер полезной 16:9 области.
+# hq/sd — 4:3 с чёрными полосами, поэтому их высота по картинке меньше.
+_THUMB_VARIANTS = (
+    ("mqdefault",     320, 180),
+    ("hqdefault",     480, 270),
+    ("sddefault",     640, 360),
+    ("maxresdefault", 1280, 720),
+)
+
+
+async def _none():
+    return None
+
+
+def _find_key(obj, key: str, depth: int = 0):
+    """Первое значение ключа key в глубину вложенных dict/list."""
+    if depth > 12:
+        return None
+    if isinstance(obj, dict):
+        if key in obj:
+            return obj[key]
+        values = obj.values()
+    elif isinstance(obj, list):
+        values = obj
+    else:
+        return None
+    for v in values:
+        found = _find_key(v, key, depth + 1)
+        if found is not None:
+            return found
+    return None
+
+
+def _text(obj) -> str:
+    """Текст из {simpleText} / {runs: [{text}]} / {content}."""
+    if not isinstance(obj, dict):
+        return ""
+    if "simpleText" in obj:
+        return obj["simpleText"]
+    if "content" in obj:
+        return obj["content"]
+    return "".join(r.get("text", "") for r in obj.get("runs", []))
+
+
+def _parse_views(text: str) -> int | str:
+    """'1,234 views' -> 1234, '1.2M views' -> 1200000; иначе как есть."""
+    m = re.match(r"([\d.,]+)\s*([KMB])?", text.strip())
+    if not m:
+        return text
+    number, suffix = m.group(1).replace(",", ""), m.group(2)
+    try:
+        return int(float(number) * _VIEWS_SUFFIX[suffix]) if suffix else int(number)
+    except ValueError:
+        return text
+
 
 class InvidiousPlugin(BasePlugin):
     def __init__(self):
@@ -24,6 +118,15 @@ class InvidiousPlugin(BasePlugin):
         self._ytdlp_path = "yt-dlp"
         self.client = httpx.AsyncClient(timeout=15.0, headers=_HEADERS,
                                         follow_redirects=True)
+        # Тёплые процессы yt-dlp; если пул не поднялся — старый путь через CLI
+        self._pool = YtDlpPool(size=2)
+        self._streams = StreamCache()
+        self._stream_inflight: dict[str, asyncio.Future] = {}
+        self._avatar_cache: dict[str, str] = {}
+        self._avatar_inflight: dict[str, asyncio.Future] = {}
+        self._details: dict[str, dict] = {}   # video_id -> просмотры/дата
+        self._related: dict[str, tuple[list, float]] = {}   # video_id -> (список, время)
+        self._related_inflight: dict[str, asyncio.Future] = {}
 
     @property
     def name(self) -> str:
@@ -32,6 +135,8 @@ class InvidiousPlugin(BasePlugin):
     # ── Инициализация ─────────────────────────────────────────────────────────
 
     async def initialize(self) -> bool:
+        if await self._pool.start():
+            return True
         try:
             proc = await asyncio.create_subprocess_exec(
                 self._ytdlp_path, "--version",
@@ -45,63 +150,111 @@ class InvidiousPlugin(BasePlugin):
             print("[yt-dlp] Не найден.")
             return False
 
-    # ── Парсинг аватарки через bs4 ────────────────────────────────────────────
+    # ── Аватарки каналов ──────────────────────────────────────────────────────
 
     async def get_channel_avatar(self, channel_id: str) -> str:
         """
-        Парсит страницу канала YouTube и извлекает URL аватарки.
-        YouTube кладёт все данные в window.ytInitialData — парсим его через re+json.
+        URL аватарки канала. Порядок: память → таблица channels в Database →
+        страница канала. Известный канал обходится без сети.
         """
         if not channel_id:
             return ""
         if channel_id in self._avatar_cache:
             return self._avatar_cache[channel_id]
 
+        if self.db is not None:
+            row = self.db.get_channel(channel_id)
+            if (row and row["avatar_url"]
+                    and time.time() - row["fetched_at"] < _CHANNEL_MAX_AGE):
+                self._avatar_cache[channel_id] = row["avatar_url"]
+                return row["avatar_url"]
+
+        # Один запрос страницы на канал, сколько бы карточек его ни ждали
+        fut = self._avatar_inflight.get(channel_id)
+        if fut is None:
+            fut = asyncio.ensure_future(self._fetch_channel(channel_id))
+            self._avatar_inflight[channel_id] = fut
+            fut.add_done_callback(lambda _f: self._avatar_inflight.pop(channel_id, None))
+        return await asyncio.shield(fut)
+
+    async def _fetch_channel(self, channel_id: str) -> str:
         url = f"https://www.youtube.com/channel/{channel_id}"
         try:
-            r = await self.client.get(url)
-            if r.status_code != 200:
-                print(f"[Avatar] HTTP {r.status_code} для {channel_id}")
-                return ""
-
-            html = r.text
-
-            # Ищем ytInitialData — большой JSON объект в теге <script>
-            match = re.search(
-                r"var ytInitialData\s*=\s*(\{.+?\});</script>",
-                html, re.DOTALL
-            )
-            if not match:
-                # Альтернативный паттерн
-                match = re.search(
-                    r"ytInitialData\s*=\s*(\{.+?\});\s*(?:var |window\[)",
-                    html, re.DOTALL
-                )
-            if not match:
-                print(f"[Avatar] ytInitialData не найден для {channel_id}")
-                return ""
-
-            data = json.loads(match.group(1))
-
-            # Путь: header → c4TabbedHeaderRenderer → avatar → thumbnails[]
-            avatar_url = self._extract_avatar_from_data(data)
-
-            if avatar_url:
-                # URL может быть без схемы: //yt3.ggpht.com/...
-                if avatar_url.startswith("//"):
-                    avatar_url = "https:" + avatar_url
-                self._avatar_cache[channel_id] = avatar_url
-                print(f"[Avatar] ✓ {channel_id[:20]}: {avatar_url[:60]}")
-                return avatar_url
-            else:
-                print(f"[Avatar] Не найден в ytInitialData для {channel_id}")
-
-        except json.JSONDecodeError as e:
-            print(f"[Avatar] JSON ошибка для {channel_id}: {e}")
+            name, avatar_url = await self._scan_channel_page(url)
         except Exception as e:
             print(f"[Avatar] {channel_id}: {type(e).__name__}: {e}")
-
-        return ""
+            return ""
+        if not avatar_url:
+            print(f"[Avatar] Не найден для {channel_id}")
+            return ""
+        # URL может быть без схемы: //yt3.ggpht.com/...
+        if avatar_url.startswith("//"):
+            avatar_url = "https:" + avatar_url
+        # og:image — 900px; на карточке и в плеере хватает 88px
+        avatar_url = _AVATAR_SIZE.sub(f"=s{_AVATAR_PX}-", avatar_url, count=1)
+        self._avatar_cache[channel_id] = avatar_url
+        if self.db is not None:
+            self.db.put_channel(channel_id, name, avatar_url)
+        print(f"[Avatar] ✓ {channel_id[:20]}: {avatar_url[:60]}")
+        return avatar_url
+
+    async def _scan_channel_page(self, url: str) -> tuple[str, str]:
+        """
+        Имя и аватарка со страницы канала: og:title/og:image из <head>.
+        Если мета-тегов нет, ytInitialData разбирается в пуле потоков.
+        """
+        found, page = await self._scan_page(url, _CHANNEL_PATTERNS)
+        name, avatar = found.get("name", ""), found.get("avatar", "")
+        if avatar or not page:
+            return name, avatar
+        loop = asyncio.get_running_loop()
+        return name, await loop.run_in_executor(None, self._avatar_from_page, page)
+
+    async def _scan_page(self, url: str, patterns: dict) -> tuple[dict, bytes]:
+        """
+        Читает страницу потоком и прекращает, как только каждый шаблон из
+        patterns нашёл совпадение, — многомегабайтный хвост не скачивается.
+        Возвращает {имя: значение} и, если нашлось не всё, прочитанные байты.
+        """
+        buf = bytearray()
+        found: dict[str, str] = {}
+        async with self.client.stream("GET", url) as r:
+            if r.status_code != 200:
+                print(f"[Scan] HTTP {r.status_code} для {url}")
+                return found, b""
+            async for chunk in r.aiter_bytes():
+                # Тег мог разрезаться границей чанка — ищем с небольшим перекрытием
+                start = max(0, len(buf) - 512)
+                buf += chunk
+                window = bytes(buf[start:])
+                for name, pattern in patterns.items():
+                    if name in found:
+                        continue
+                    m = pattern.search(window)
+                    if m:
+                        value = next(g for g in m.groups() if g is not None)
+                        found[name] = html.unescape(value.decode(errors="replace"))
+                if len(found) == len(patterns):
+                    return found, b""
+                if len(buf) > _PAGE_SCAN_LIMIT:
+                    break
+        return found, bytes(buf)
+
+    def _avatar_from_page(self, page: bytes) -> str:
+        """Запасной путь (в пуле потоков): аватарка из ytInitialData."""
+        text = page.decode("utf-8", errors="replace")
+        start = text.find("ytInitialData")
+        if start < 0:
+            return ""
+        start = text.find("{", start)
+        end = text.find(";</script>", start)
+        if start < 0 or end < 0:
+            return ""
+        try:
+            data = json.loads(text[start:end])
+        except json.JSONDecodeError:
+            return ""
+        return self._extract_avatar_from_data(data)
 
     def _extract_avatar_from_data(self, data: dict) -> str:
         """Рекурсивно ищет аватарку в ytInitialData."""
@@ -152,42 +305,160 @@ class InvidiousPlugin(BasePlugin):
                     return result
         return ""
 
-    # ── Обогащение результатов аватарками ─────────────────────────────────────
+    # ── Обогащение карточек ───────────────────────────────────────────────────
 
-    async def _enrich_with_avatars(self, results: list[dict], cache_manager=None):
-        """Параллельно подгружает аватарки для всех уникальных каналов."""
-        unique_ids = {
-            r["channel_id"] for r in results
-            if r.get("channel_id") and r["channel_id"] not in self._avatar_cache
+    async def enrich(self, item: dict) -> dict:
+        """Аватарка канала, точные просмотры и дата загрузки для одной карточки."""
+        video_id = item.get("id", "")
+        channel_id = item.get("channel_id", "")
+        details, avatar = await asyncio.gather(
+            self._video_details(video_id) if not item.get("upload_date") else _none(),
+            self.get_channel_avatar(channel_id) if not item.get("avatar_url") else _none(),
+        )
+        fields = dict(details or {})
+        if avatar:
+            fields["avatar_url"] = avatar
+        return fields
+
+    async def _video_details(self, video_id: str) -> dict:
+        if not video_id:
+            return {}
+        details = self._details.get(video_id)
+        if details is not None:
+            return details
+        try:
+            found, _ = await self._scan_page(
+                f"https://www.youtube.com/watch?v={video_id}", _WATCH_PATTERNS)
+        except httpx.HTTPError as e:
+            print(f"[Details] {video_id}: {type(e).__name__}: {e}")
+            return {}
+        details = {}
+        if found.get("view_count", "").isdigit():
+            details["view_count"] = int(found["view_count"])
+        if found.get("upload_date"):
+            details["upload_date"] = found["upload_date"][:10]   # YYYY-MM-DD
+        self._details[video_id] = details
+        while len(self._details) > _DETAILS_MAX:
+            self._details.pop(next(iter(self._details)))
+        return details
+
+    # ── Похожие видео ─────────────────────────────────────────────────────────
+
+    async def get_related(self, video_id: str, title: str = "") -> list[dict]:
+        """
+        Рекомендации со страницы просмотра (youtubei/v1/next) с кэшем на час;
+        один запрос на видео, даже если его ждут и предзагрузка, и плеер.
+        Если API ничего не отдал — поиск по заголовку, как раньше.
+        """
+        cached = self._related.get(video_id)
+        if cached and time.time() - cached[1] < _RELATED_TTL:
+            return cached[0]
+        fut = self._related_inflight.get(video_id)
+        if fut is None:
+            fut = asyncio.ensure_future(self._fetch_related(video_id, title))
+            self._related_inflight[video_id] = fut
+            fut.add_done_callback(lambda _f: self._related_inflight.pop(video_id, None))
+        return await asyncio.shield(fut)
+
+    def cached_related(self, video_id: str) -> list[dict] | None:
+        """Похожие из кэша без запроса — для мгновенного показа в плеере."""
+        cached = self._related.get(video_id)
+        if cached and time.time() - cached[1] < _RELATED_TTL:
+            return cached[0]
+        return None
+
+    async def _fetch_related(self, video_id: str, title: str) -> list[dict]:
+        related = []
+        try:
+            r = await self.client.post(_NEXT_URL, json={"context": _NEXT_CONTEXT,
+                                                        "videoId": video_id})
+            r.raise_for_status()
+            # Ответ — сотни килобайт JSON: разбираем вне цикла событий
+            loop = asyncio.get_running_loop()
+            related = await loop.run_in_executor(None, self._parse_related, r.content)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"[Related] {video_id}: {type(e).__name__}: {e}")
+        related = [v for v in related if v["id"] != video_id]
+        if not related:
+            related = await super().get_related(video_id, title)
+        if related:
+            self._related[video_id] = (related, time.time())
+            while len(self._related) > _RELATED_MAX:
+                self._related.pop(next(iter(self._related)))
+        return related
+
+    def _parse_related(self, body: bytes) -> list[dict]:
+        data = json.loads(body)
+        results = _find_key(data, "secondaryResults") or {}
+        if isinstance(results, dict):
+            results = results.get("secondaryResults", results).get("results", [])
+        entries = []
+        for entry in results if isinstance(results, list) else []:
+            # Новая раскладка прячет карточки в itemSectionRenderer
+            section = entry.get("itemSectionRenderer")
+            entries.extend(section.get("contents", []) if section else [entry])
+        related = []
+        for entry in entries:
+            if "compactVideoRenderer" in entry:
+                item = self._from_compact_renderer(entry["compactVideoRenderer"])
+            elif "lockupViewModel" in entry:
+                item = self._from_lockup(entry["lockupViewModel"])
+            else:
+                continue
+            if item and item["id"]:
+                related.append(item)
+        return related
+
+    def _from_compact_renderer(self, v: dict) -> dict:
+        byline = v.get("longBylineText") or v.get("shortBylineText") or {}
+        runs = byline.get("runs") or [{}]
+        channel_id = (runs[0].get("navigationEndpoint", {})
+                      .get("browseEndpoint", {}).get("browseId", ""))
+        return self._related_item(
+            v.get("videoId", ""), _text(v.get("title")), _text(byline), channel_id,
+            _text(v.get("lengthText")), _text(v.get("viewCountText")))
+
+    def _from_lockup(self, v: dict) -> dict | None:
+        if v.get("contentType") not in (None, "LOCKUP_CONTENT_TYPE_VIDEO"):
+            return None   # плейлисты и миксы
+        meta = v.get("metadata", {}).get("lockupMetadataViewModel", {})
+        rows = (meta.get("metadata", {}).get("contentMetadataViewModel", {})
+                .get("metadataRows", []))
+        parts = [[_text(p.get("text")) for p in row.get("metadataParts", [])]
+                 for row in rows]
+        channel = parts[0][0] if parts and parts[0] else ""
+        views = parts[1][0] if len(parts) > 1 and parts[1] else ""
+        badge = _find_key(v.get("contentImage", {}), "thumbnailBadgeViewModel") or {}
+        browse_id = _find_key(v, "browseId") or ""
+        return self._related_item(
+            v.get("contentId", ""), _text(meta.get("title")), channel,
+            browse_id if browse_id.startswith("UC") else "",
+            badge.get("text", ""), views)
+
+    def _related_item(self, video_id: str, title: str, channel: str,
+                      channel_id: str, duration: str, views: str) -> dict:
+        return {
+            "id":          video_id,
+            "title":       title or "No Title",
+            "channel":     channel or "Unknown",
+            "channel_id":  channel_id,
+            "avatar_url":  "",
+            "duration":    duration,
+            "thumbnail":   self._thumbnail_url(video_id) if video_id else "",
+            "view_count":  _parse_views(views) if views else "",
+            "upload_date": "",
         }
 
-        if unique_ids:
-            tasks = [self.get_channel_avatar(cid) for cid in unique_ids]
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Проставляем avatar_url в каждый результат
-        for r in results:
-            cid = r.get("channel_id", "")
-            r["avatar_url"] = self._avatar_cache.get(cid, "")
-
-        # Скачиваем все аватарки через cache_manager и ждём завершения
-        if cache_manager:
-            download_tasks = [
-                cache_manager.get_image(r["avatar_url"])
-                for r in results if r.get("avatar_url")
-            ]
-            if download_tasks:
-                await asyncio.gather(*download_tasks, return_exceptions=True)
-
-        # Только теперь сигналим — все картинки уже в кэше
-        self._signaller.avatars_ready.emit()
-
     # ── yt-dlp ────────────────────────────────────────────────────────────────
 
-    async def _run_flat(self, *args) -> list[dict]:
+    async def _run_flat_stream(self, *args):
+        """
+        yt-dlp CLI с --flat-playlist -j: по JSON-строке на запись,
+        каждая отдаётся сразу, не дожидаясь конца выдачи.
+        """
         cmd = [
             self._ytdlp_path,
-            "--dump-single-json",
+            "--dump-json",
             "--flat-playlist",
             "--no-warnings",
             "--quiet",
@@ -198,24 +469,51 @@ class InvidiousPlugin(BasePlugin):
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
         )
+        deadline = asyncio.get_running_loop().time() + 30.0
         try:
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30.0)
-        except asyncio.TimeoutError:
-            proc.kill()
-            print("[yt-dlp] Таймаут")
-            return []
-
-        if stderr:
-            err = stderr.decode(errors="replace").strip()
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    line = await asyncio.wait_for(proc.stdout.readline(),
+                                                  timeout=max(remaining, 0))
+                except asyncio.TimeoutError:
+                    print("[yt-dlp] Таймаут")
+                    raise PartialResults("таймаут yt-dlp")
+                if not line:
+                    break
+                try:
+                    yield json.loads(line.decode(errors="replace"))
+                except json.JSONDecodeError:
+                    print("[yt-dlp] Ошибка парсинга JSON")
+
+            err = (await proc.stderr.read()).decode(errors="replace").strip()
             if err:
                 print(f"[yt-dlp] stderr: {err}")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
 
+    async def _search_entries(self, query: str, start: int, count: int):
+        """
+        Сырые записи выдачи [start, start + count) по одной:
+        через пул, иначе через CLI.
+        """
+        started = False
+        params = {"query": query, "start": start, "count": count}
         try:
-            data = json.loads(stdout.decode(errors="replace"))
-            return data.get("entries", []) or []
-        except (json.JSONDecodeError, AttributeError):
-            print("[yt-dlp] Ошибка парсинга JSON")
-            return []
+            async for entry in self._pool.stream("search", params):
+                started = True
+                yield entry
+            return
+        except YtDlpError as e:
+            if started:
+                print(f"[yt-dlp] Пул: {e} — выдача оборвалась")
+                raise PartialResults(str(e)) from e
+            print(f"[yt-dlp] Пул: {e} — запускаю CLI")
+        async for entry in self._run_flat_stream(
+                "--playlist-items", f"{start + 1}:{start + count}",
+                f"ytsearch{start + count}:{query}"):
+            yield entry
 
     def _parse_entry(self, e: dict) -> dict:
         duration_sec = e.get("duration") or 0
@@ -224,7 +522,7 @@ class InvidiousPlugin(BasePlugin):
         duration_str = f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
 
         video_id = e.get("id", "")
-        thumbnail = (f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+        thumbnail = (self._thumbnail_url(video_id)
                      if video_id and not video_id.startswith("UC") else "")
 
         channel_id = e.get("channel_id") or e.get("uploader_id") or ""
@@ -238,36 +536,97 @@ class InvidiousPlugin(BasePlugin):
             "duration":    duration_str,
             "thumbnail":   thumbnail,
             "view_count":  e.get("view_count", ""),
+            "upload_date": "",
         }
 
+    def _thumbnail_url(self, video_id: str) -> str:
+        """Наименьший вариант превью, покрывающий карточку с учётом DPR."""
+        w, h, dpr = self.thumbnail_hint
+        need_w, need_h = w * dpr, h * dpr
+        name = _THUMB_VARIANTS[-1][0]
+        for variant, vw, vh in _THUMB_VARIANTS:
+            if vw >= need_w and vh >= need_h:
+                name = variant
+                break
+        return f"https://i.ytimg.com/vi/{video_id}/{name}.jpg"
+
     # ── Публичный API ─────────────────────────────────────────────────────────
 
+    async def search_stream(self, query: str, page: int = 0):
+        print(f"[yt-dlp] Поиск: {query} (стр. {page + 1})")
+        found = 0
+        async for e in self._search_entries(query, page * self.page_size,
+                                            self.page_size):
+            if e.get("id", "").startswith("UC"):
+                continue
+            found += 1
+            yield self._parse_entry(e)
+        print(f"[yt-dlp] Найдено: {found}")
+
     async def search(self, query: str) -> list[dict]:
-        print(f"[yt-dlp] Поиск: {query}")
-        entries = await self._run_flat(f"ytsearch20:{query}")
-        results = [
-            self._parse_entry(e) for e in entries
-            if not e.get("id", "").startswith("UC")
-        ]
-        print(f"[yt-dlp] Найдено: {len(results)}")
-        return results
+        try:
+            return await collect(self.search_stream(query))
+        except PartialResults as e:
+            return e.results
 
     async def get_trending(self) -> list[dict]:
         print("[yt-dlp] Загрузка трендов...")
         return await self.search("trending today")
 
+    async def trending_stream(self, page: int = 0):
+        async for item in self.search_stream("trending today", page):
+            yield item
+
     async def get_stream_url(self, video_id: str) -> str:
+        return (await self.get_stream_info(video_id)).get("url", "")
+
+    async def get_stream_info(self, video_id: str) -> dict:
+        info = self._streams.get(video_id, _STREAM_FORMAT)
+        if info is not None:
+            print(f"[yt-dlp] Стрим из кэша")
+            return info
+        # Клик по карточке, которую уже извлекает упреждение, ждёт то же извлечение
+        fut = self._stream_inflight.get(video_id)
+        if fut is None:
+            fut = asyncio.ensure_future(self._extract_stream(video_id))
+            self._stream_inflight[video_id] = fut
+            fut.add_done_callback(lambda _f: self._stream_inflight.pop(video_id, None))
+        info = await asyncio.shield(fut)
+        self._streams.put(video_id, _STREAM_FORMAT, info)
+        return info
+
+    def cached_stream(self, video_id: str) -> dict | None:
+        return self._streams.get(video_id, _STREAM_FORMAT)
+
+    def invalidate_stream(self, video_id: str):
+        self._streams.invalidate(video_id)
+
+    async def _extract_stream(self, video_id: str) -> dict:
+        page_url = f"https://www.youtube.com/watch?v={video_id}"
+        try:
+            info = await self._pool.call("extract", {
+                "url": page_url,
+                "format": _STREAM_FORMAT,
+            })
+            print(f"[yt-dlp] Стрим получен")
+            return info
+        except YtDlpError as e:
+            print(f"[yt-dlp] Пул: {e} — извлекаю в потоке")
         try:
             loop = asyncio.get_event_loop()
             def extract():
-                with yt_dlp.YoutubeDL({'format': 'best[ext=mp4]', 'quiet': True}) as ydl:
-                    return ydl.extract_info(
-                        f"https://www.youtube.com/watch?v={video_id}",
-                        download=False
-                    )['url']
-            url = await loop.run_in_executor(None, extract)
+                import yt_dlp   # тяжёлый импорт — только когда пул недоступен
+                with yt_dlp.YoutubeDL({'format': _STREAM_FORMAT, 'quiet': True}) as ydl:
+                    return ydl.extract_info(page_url, download=False)
+            data = await loop.run_in_executor(None, extract)
             print(f"[yt-dlp] Стрим получен")
-            return url
+            return {
+                "url":      data.get("url", ""),
+                "width":    data.get("width") or 0,
+                "height":   data.get("height") or 0,
+                "fps":      data.get("fps") or 0,
+                "duration": data.get("duration") or 0,
+            }
         except Exception as e:
             print(f"[yt-dlp] Ошибка получения ссылки: {e}")
-            return ""
\ No newline at end of file
+            return {"url": ""}
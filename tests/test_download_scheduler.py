@@ -0,0 +1,125 @@
+import asyncio
+
+from core.download_scheduler import DownloadScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _tick(n: int = 3):
+    for _ in range(n):
+        await asyncio.sleep(0)
+
+
+def _factory(log: list, url: str, gate: asyncio.Event | None = None):
+    async def download():
+        log.append(url)
+        if gate is not None:
+            await gate.wait()
+    return download
+
+
+def test_priority_order_and_global_limit():
+    async def main():
+        sched = DownloadScheduler(max_concurrent=1, per_host=4)
+        started, gate = [], asyncio.Event()
+        sched.submit("http://a/blocker", 0, _factory(started, "http://a/blocker", gate))
+        for url, priority in [("http://a/3", 30), ("http://a/1", 10), ("http://a/2", 20)]:
+            sched.submit(url, priority, _factory(started, url))
+        await _tick()
+        assert started == ["http://a/blocker"]
+        gate.set()
+        await _tick(10)
+        return started
+    assert run(main()) == ["http://a/blocker", "http://a/1", "http://a/2", "http://a/3"]
+
+
+def test_per_host_limit():
+    async def main():
+        sched = DownloadScheduler(max_concurrent=4, per_host=1)
+        started, gate = [], asyncio.Event()
+        for url in ("http://a/1", "http://a/2", "http://b/1"):
+            sched.submit(url, 10, _factory(started, url, gate))
+        await _tick()
+        snapshot = sorted(started)
+        gate.set()
+        await _tick(10)
+        return snapshot, sorted(started)
+    running, done = run(main())
+    assert running == ["http://a/1", "http://b/1"]
+    assert done == ["http://a/1", "http://a/2", "http://b/1"]
+
+
+def test_resubmit_raises_priority_only():
+    async def main():
+        sched = DownloadScheduler(max_concurrent=1)
+        started, gate = [], asyncio.Event()
+        sched.submit("http://a/blocker", 0, _factory(started, "http://a/blocker", gate))
+        sched.submit("http://a/x", 50, _factory(started, "http://a/x"))
+        sched.submit("http://a/y", 40, _factory(started, "http://a/y"))
+        sched.submit("http://a/x", 10, _factory(started, "http://a/x"))
+        sched.submit("http://a/y", 90, _factory(started, "http://a/y"))   # не понижает
+        gate.set()
+        await _tick(10)
+        return started
+    assert run(main()) == ["http://a/blocker", "http://a/x", "http://a/y"]
+
+
+def test_retain_drops_queued_and_cancels_running():
+    async def main():
+        sched = DownloadScheduler(max_concurrent=1)
+        started, gate = [], asyncio.Event()
+        sched.submit("http://a/1", 10, _factory(started, "http://a/1", gate))
+        sched.submit("http://a/2", 10, _factory(started, "http://a/2"))
+        await _tick()
+        dropped = sched.retain({})
+        await _tick()
+        return sorted(dropped), sched.in_flight, sched.queue_depth
+    dropped, in_flight, depth = run(main())
+    assert dropped == ["http://a/1", "http://a/2"]
+    assert (in_flight, depth) == (0, 0)
+
+
+def test_retain_keeps_pinned():
+    async def main():
+        sched = DownloadScheduler(max_concurrent=1)
+        started, gate = [], asyncio.Event()
+        sched.submit("http://a/1", 10, _factory(started, "http://a/1", gate), pinned=True)
+        await _tick()
+        dropped = sched.retain({})
+        gate.set()
+        await _tick()
+        return dropped, started
+    assert run(main()) == ([], ["http://a/1"])
+
+
+def test_cancel_before_start_frees_slot():
+    """retain() в том же тике, что и старт задачи: слот не должен утечь."""
+    async def main():
+        sched = DownloadScheduler(max_concurrent=1, per_host=1)
+        started = []
+        sched.submit("http://a/1", 10, _factory(started, "http://a/1"))
+        sched.submit("http://a/2", 10, _factory(started, "http://a/2"))
+        # Задача для a/1 создана, но ещё ни разу не выполнялась
+        dropped = sched.retain({"http://a/2": 10})
+        await _tick(10)
+        return dropped, started, sched.in_flight, sched.queue_depth, sched._host_active
+    dropped, started, in_flight, depth, hosts = run(main())
+    assert dropped == ["http://a/1"]
+    assert started == ["http://a/2"]
+    assert (in_flight, depth) == (0, 0)
+    assert hosts == {"a": 0}
+
+
+def test_cancelled_url_can_be_resubmitted_immediately():
+    async def main():
+        sched = DownloadScheduler(max_concurrent=2)
+        started, gate = [], asyncio.Event()
+        sched.submit("http://a/1", 10, _factory(started, "http://a/1", gate))
+        await _tick()
+        sched.retain({})
+        sched.submit("http://a/1", 10, _factory(started, "http://a/1"))
+        await _tick(10)
+        return started, sched.in_flight
+    assert run(main()) == (["http://a/1", "http://a/1"], 0)
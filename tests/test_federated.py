@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from core.federated import FederatedSearch
+from core.interfaces import PartialResults, collect
+
+
+class FakePlugin:
+    def __init__(self, name, ids, delay=0.0, fail_after=None):
+        self.name = name
+        self.ids = ids
+        self.delay = delay
+        self.fail_after = fail_after
+
+    async def search_stream(self, query, page=0):
+        for n, vid in enumerate(self.ids):
+            if n == self.fail_after:
+                raise RuntimeError("источник упал")
+            await asyncio.sleep(self.delay)
+            yield {"id": vid, "title": f"{self.name}:{vid}"}
+
+
+def test_name_is_stable_cache_key():
+    a, b = FakePlugin("B", []), FakePlugin("A", [])
+    assert FederatedSearch([a, b]).name == FederatedSearch([b, a]).name == "A+B"
+
+
+def test_merge_dedups_and_ranks():
+    fs = FederatedSearch([FakePlugin("A", ["1", "2", "3"], delay=0.02),
+                          FakePlugin("B", ["2", "9"], delay=0.001)])
+    items = asyncio.run(collect(fs.search_stream("q", page=1)))
+    ids = [i["id"] for i in items]
+    assert sorted(ids) == ["1", "2", "3", "9"]
+    # Быстрый источник первым отдал "2" — дубль от медленного отброшен
+    two = next(i for i in items if i["id"] == "2")
+    assert two["source"] == "B"
+    # Ранг не зависит от скорости ответа: чередование по месту в источнике
+    ranked = sorted(items, key=lambda i: i["rank"])
+    assert [i["id"] for i in ranked] == ["1", "2", "9", "3"]
+    assert all(i["rank"][0] == 1 for i in items)
+
+
+def test_deadline_cuts_slow_source():
+    fs = FederatedSearch([FakePlugin("fast", ["1", "2"]),
+                          FakePlugin("slow", ["x", "y", "z"], delay=0.2)], deadline=0.3)
+
+    async def main():
+        with pytest.raises(PartialResults) as err:
+            await collect(fs.search_stream("q"))
+        return err.value.results
+    results = asyncio.run(asyncio.wait_for(main(), 2))
+    ids = [i["id"] for i in results]
+    assert ids[:2] == ["1", "2"] and "x" in ids and "z" not in ids
+
+
+def test_failing_source_marks_page_partial():
+    fs = FederatedSearch([FakePlugin("ok", ["1"]), FakePlugin("bad", ["x", "y"], fail_after=1)])
+
+    async def main():
+        with pytest.raises(PartialResults) as err:
+            await collect(fs.search_stream("q"))
+        return sorted(i["id"] for i in err.value.results)
+    assert asyncio.run(main()) == ["1", "x"]
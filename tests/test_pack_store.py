@@ -0,0 +1,73 @@
+import hashlib
+import os
+
+from core.pack_store import PackStore
+
+
+def key(name: str) -> str:
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def test_write_read_and_overwrite(tmp_path):
+    store = PackStore(str(tmp_path))
+    store.write(key("a"), b"first")
+    store.write(key("b"), b"other")
+    store.write(key("a"), b"second")
+    assert bytes(store.read(key("a"))) == b"second"
+    assert bytes(store.read(key("b"))) == b"other"
+    assert store.read(key("missing")) is None
+    assert store.scan() == {key("a"): 6, key("b"): 5}
+    store.close()
+
+
+def test_reopen_restores_index_and_tombstones(tmp_path):
+    store = PackStore(str(tmp_path))
+    store.write(key("a"), b"alpha")
+    store.write(key("b"), b"beta")
+    store.remove([key("a")])
+    store.close()
+
+    store = PackStore(str(tmp_path))
+    assert not store.has(key("a"))
+    assert bytes(store.read(key("b"))) == b"beta"
+    store.close()
+
+
+def test_reopen_truncates_torn_tail(tmp_path):
+    store = PackStore(str(tmp_path))
+    store.write(key("a"), b"alpha")
+    store.close()
+    seg = os.path.join(str(tmp_path), "packs", "seg-00001.pack")
+    with open(seg, "ab") as f:
+        f.write(b"NXPK\x00\x01")   # запись оборвалась на заголовке
+
+    store = PackStore(str(tmp_path))
+    assert bytes(store.read(key("a"))) == b"alpha"
+    store.write(key("b"), b"beta")
+    store.close()
+    store = PackStore(str(tmp_path))
+    assert bytes(store.read(key("b"))) == b"beta"
+    store.close()
+
+
+def test_compact_rewrites_holey_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(PackStore, "SEGMENT_MAX", 64)
+    store = PackStore(str(tmp_path))
+    payload = {key(str(i)): bytes([i]) * 40 for i in range(6)}
+    for k, data in payload.items():
+        store.write(k, data)
+    dead = list(payload)[:4]
+    store.remove(dead)
+    before = set(os.listdir(os.path.join(str(tmp_path), "packs")))
+    store.compact()
+    after = set(os.listdir(os.path.join(str(tmp_path), "packs")))
+    assert after != before
+    for k, data in payload.items():
+        got = store.read(k)
+        assert (bytes(got) if got is not None else None) == (None if k in dead else data)
+    store.close()
+
+    # После перезапуска удалённые не «воскресают»
+    store = PackStore(str(tmp_path))
+    assert set(store.scan()) == set(payload) - set(dead)
+    store.close()
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+
+from core.database import Database
+from core.interfaces import PartialResults
+from core.query_cache import QueryCache
+
+KEY = ("p", "query", 0)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryCache(Database(str(tmp_path / "test.db")), ttl=60, max_stale=3600)
+
+
+def counting_fetch(results, delay=0.01):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return list(results)
+    return fetch, calls
+
+
+def test_make_key_normalizes_query():
+    assert QueryCache.make_key("p", "  Hello   World ") == ("p", "hello world", 0)
+
+
+def test_miss_then_fresh_hit(cache):
+    fetch, calls = counting_fetch([1, 2])
+
+    async def main():
+        first = await cache.get(KEY, fetch)
+        second = await cache.get(KEY, fetch)
+        return first, second
+    assert asyncio.run(main()) == ([1, 2], [1, 2])
+    assert len(calls) == 1
+
+
+def test_single_flight(cache):
+    fetch, calls = counting_fetch([1])
+
+    async def main():
+        return await asyncio.gather(*(cache.get(KEY, fetch) for _ in range(3)))
+    assert asyncio.run(main()) == [[1], [1], [1]]
+    assert len(calls) == 1
+
+
+def test_last_waiter_cancels_fetch(cache):
+    async def main():
+        flag = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                flag.set()
+                raise
+        a = asyncio.ensure_future(cache.get(KEY, fetch))
+        b = asyncio.ensure_future(cache.get(KEY, fetch))
+        await asyncio.sleep(0.01)
+        a.cancel()
+        await asyncio.sleep(0.01)
+        still_running = not flag.is_set()
+        b.cancel()
+        await asyncio.sleep(0.01)
+        return still_running, flag.is_set(), cache._inflight, cache._waiters
+    assert asyncio.run(main()) == (True, True, {}, {})
+
+
+def test_stale_while_revalidate(cache, monkeypatch):
+    cache.store(KEY, [1])
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)   # старше ttl, моложе max_stale
+    fetch, calls = counting_fetch([1, 2])
+    updates = []
+
+    async def main():
+        stale = await cache.get(KEY, fetch, on_update=updates.append)
+        await asyncio.sleep(0.05)
+        return stale
+    assert asyncio.run(main()) == [1]
+    assert updates == [[1, 2]] and len(calls) == 1
+
+
+def test_empty_and_partial_results_not_stored(cache):
+    async def partial():
+        raise PartialResults("обрыв", [1])
+
+    async def empty():
+        return []
+
+    async def main():
+        got = await cache.get(KEY, partial)
+        assert cache.lookup(KEY) is None
+        await cache.get(("p", "other", 0), empty)
+        return got, cache.lookup(("p", "other", 0))
+    assert asyncio.run(main()) == ([1], None)
+
+
+def test_truncated_revalidation_keeps_stale(cache, monkeypatch):
+    cache.store(KEY, [1, 2, 3])
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    updates = []
+
+    async def partial():
+        raise PartialResults("обрыв", [9])
+
+    async def main():
+        await cache.get(KEY, partial, on_update=updates.append)
+        await asyncio.sleep(0.01)
+    asyncio.run(main())
+    assert updates == []
+    assert cache.lookup(KEY)[0] == [1, 2, 3]
@@ -0,0 +1,41 @@
+import time
+
+from core.stream_cache import StreamCache, stream_expiry
+
+
+def test_expiry_from_query_and_path():
+    assert stream_expiry("https://r1.googlevideo.com/videoplayback?expire=1700000000&x=1") == 1700000000
+    assert stream_expiry("https://manifest.googlevideo.com/api/expire/1700000123/ei/x") == 1700000123
+    assert stream_expiry("https://example.com/video.mp4") is None
+    assert stream_expiry("https://example.com/v?expire=soon") is None
+
+
+def test_put_respects_safety_margin():
+    cache = StreamCache()
+    soon = int(time.time()) + StreamCache.SAFETY_MARGIN - 5
+    later = int(time.time()) + 6 * 3600
+    cache.put("a", "mp4", {"url": f"https://x/videoplayback?expire={soon}"})
+    cache.put("b", "mp4", {"url": f"https://x/videoplayback?expire={later}"})
+    assert cache.get("a", "mp4") is None
+    assert cache.get("b", "mp4")["url"].endswith(str(later))
+
+
+def test_entry_expires(monkeypatch):
+    cache = StreamCache()
+    now = time.time()
+    cache.put("a", "mp4", {"url": "https://example.com/no-expire.mp4"})
+    monkeypatch.setattr(time, "time", lambda: now + StreamCache.DEFAULT_TTL + 1)
+    assert cache.get("a", "mp4") is None
+    assert len(cache) == 0
+
+
+def test_invalidate_and_lru_bound(monkeypatch):
+    monkeypatch.setattr(StreamCache, "MAX_ENTRIES", 2)
+    cache = StreamCache()
+    for vid in ("a", "b", "c"):
+        cache.put(vid, "mp4", {"url": f"https://example.com/{vid}"})
+    assert cache.get("a", "mp4") is None
+    cache.put("b", "webm", {"url": "https://example.com/b.webm"})
+    cache.invalidate("b")
+    assert cache.get("b", "mp4") is None and cache.get("b", "webm") is None
+    assert cache.get("c", "mp4") is not None
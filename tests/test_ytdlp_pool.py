@@ -0,0 +1,99 @@
+import asyncio
+import textwrap
+
+import pytest
+
+import core.ytdlp_pool as ytdlp_pool
+from core.ytdlp_pool import YtDlpPool, YtDlpError
+
+# Воркер с протоколом ytdlp_worker.py, но без yt_dlp
+FAKE_WORKER = textwrap.dedent('''
+    import sys, json, os
+    for line in sys.stdin:
+        req = json.loads(line)
+        method, params = req["method"], req["params"]
+        if method == "crash":
+            os._exit(1)
+        if method == "fail":
+            reply = {"id": req["id"], "ok": False, "error": "extractor"}
+        elif method == "ping":
+            reply = {"id": req["id"], "ok": True, "result": {"version": "fake"}}
+        else:
+            for item in params.get("items", []):
+                print(json.dumps({"id": req["id"], "item": item}), flush=True)
+            reply = {"id": req["id"], "ok": True, "result": params}
+        print(json.dumps(reply), flush=True)
+''')
+
+
+def run(coro):
+    # Зависший пул — провал теста, а не зависший прогон
+    return asyncio.run(asyncio.wait_for(coro, 20))
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    monkeypatch.setattr(ytdlp_pool, "WORKER_SCRIPT", str(script))
+    return YtDlpPool(size=2, timeout=5)
+
+
+def test_call_and_stream(pool):
+    async def main():
+        try:
+            echoed = await pool.call("echo", {"x": 1})
+            items = [i async for i in pool.stream("echo", {"items": [1, 2, 3]})]
+            return echoed, items
+        finally:
+            await pool.close()
+    assert run(main()) == ({"x": 1}, [1, 2, 3])
+
+
+def test_extractor_error_keeps_worker(pool):
+    async def main():
+        try:
+            with pytest.raises(YtDlpError):
+                await pool.call("fail", {})
+            return await asyncio.gather(*(pool.call("echo", {"n": n}) for n in range(4)))
+        finally:
+            await pool.close()
+    assert run(main()) == [{"n": n} for n in range(4)]
+
+
+def test_crashed_worker_is_replaced(pool):
+    """После падения воркера следующие вызовы не должны получить мёртвый процесс."""
+    async def main():
+        try:
+            for _ in range(3):
+                with pytest.raises(YtDlpError):
+                    await pool.call("crash", {})
+                results = await asyncio.gather(
+                    *(pool.call("echo", {"n": n}) for n in range(3)))
+                assert results == [{"n": n} for n in range(3)]
+            return pool.failed
+        finally:
+            await pool.close()
+    assert run(main()) is False
+
+
+def test_cancelled_start_kills_spawned_workers(tmp_path, monkeypatch):
+    script = tmp_path / "slow_worker.py"
+    script.write_text("import time\ntime.sleep(60)\n")   # не отвечает на ping
+    monkeypatch.setattr(ytdlp_pool, "WORKER_SCRIPT", str(script))
+    spawned = []
+    original_start = ytdlp_pool._Worker.start
+
+    async def start(worker):
+        await original_start(worker)
+        spawned.append(worker)
+    monkeypatch.setattr(ytdlp_pool._Worker, "start", start)
+
+    async def main():
+        pool = YtDlpPool(size=2)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.start(), 0.5)
+        for w in spawned:
+            await asyncio.wait_for(w.proc.wait(), 5)
+        return [w.alive for w in spawned]
+    assert run(main()) == [False, False]
@@ -0,0 +1,76 @@
+# ui/debug_panel.py
+"""
+Отладочная панель кэша (F12 в главном окне).
+
+Раз в секунду перечитывает CacheManager.metrics_snapshot() и показывает
+его текстом; кнопка сохраняет тот же снимок в JSON.
+"""
+import json
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QPlainTextEdit)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+
+
+class CacheDebugPanel(QWidget):
+    def __init__(self, cache_manager, parent=None):
+        super().__init__(parent, Qt.Tool)
+        self.cache = cache_manager
+        self.setWindowTitle("Кэш — метрики")
+        self.resize(460, 640)
+        self.setStyleSheet("background:#0f0f0f; color:#f1f1f1;")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(8)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        self.text.setStyleSheet("background:#1a1a1a; border:none; border-radius:6px;")
+        layout.addWidget(self.text, stretch=1)
+
+        buttons = QHBoxLayout()
+        self.dump_btn = QPushButton("Сохранить JSON")
+        self.dump_btn.setCursor(Qt.PointingHandCursor)
+        self.dump_btn.setStyleSheet(
+            "QPushButton{background:#272727;border:none;border-radius:6px;padding:6px 12px;}"
+            "QPushButton:hover{background:#3f3f3f;}")
+        self.dump_btn.clicked.connect(lambda: self.cache.dump_metrics())
+        buttons.addStretch()
+        buttons.addWidget(self.dump_btn)
+        layout.addLayout(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        snap = self.cache.metrics_snapshot()
+        var, disk = snap["variants"], snap["disk"]
+
+        def ratio(hits, misses):
+            total = hits + misses
+            return f"{hits / total:.0%}" if total else "—"
+
+        c = snap["counters"]
+        lines = [
+            f"варианты  hit {ratio(var['hits'], var['misses'])}  "
+            f"{var['bytes'] // 1024} / {var['budget'] // 1024} КБ  вытеснено {var['evictions']}",
+            f"диск      hit {ratio(c.get('disk_hits', 0), c.get('disk_misses', 0))}  "
+            f"{disk['bytes'] // 1024} / {disk['budget'] // 1024} КБ  вытеснено {disk['evictions']}",
+            "",
+            json.dumps({k: snap[k] for k in ("downloads", "decoder", "counters", "hosts")},
+                       ensure_ascii=False, indent=2),
+        ]
+        self.text.setPlainText("\n".join(lines))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
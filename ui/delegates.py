@@ -1,7 +1,9 @@
 from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
-from PyQt5.QtCore import Qt, QRect, QSize, QRectF
+from PyQt5.QtCore import Qt, QRect, QSize, QRectF, QTimer
 from PyQt5.QtGui import QPainter, QColor, QFont, QPainterPath, QFontMetrics
 
+from core.download_scheduler import PRIORITY_VISIBLE, PRIORITY_PREFETCH
+
 
 class VideoDelegate(QStyledItemDelegate):
     CARD_W  = 320
@@ -9,19 +11,110 @@ class VideoDelegate(QStyledItemDelegate):
     THUMB_H = 180
     AVATAR  = 36
     RADIUS  = 10
+    PREFETCH_ROWS = 2   # сколько рядов выше/ниже экрана качаем заранее
 
     def __init__(self, cache_manager, parent=None):
         super().__init__(parent)
         self.cache = cache_manager
+        self._thumb_size: QSize | None = None   # последний размер превью
+
+        # url -> строки, которые рисовали эту картинку (заполняется в paint())
+        self._url_rows: dict[str, set[int]] = {}
+        self._ready_urls: set[str] = set()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self._flush_repaints)
 
-        # Подписываемся на сигнал «картинка готова» — перерисовываем viewport
+        # Подписываемся на сигнал «картинка готова» — перерисовываем карточки
         self.cache.image_ready.connect(self._on_image_ready)
 
     def _on_image_ready(self, url: str):
-        """Вызывается из главного потока когда картинка скачана."""
+        """
+        Вызывается из главного потока когда картинка скачана/декодирована.
+        Уведомления копятся до конца тика цикла и разбираются одним проходом.
+        """
+        if url in self._url_rows:
+            self._ready_urls.add(url)
+            self._flush_timer.start()
+
+    def _flush_repaints(self):
+        """Инвалидирует только прямоугольники карточек с готовыми URL."""
         widget = self.parent()
-        if widget and hasattr(widget, 'viewport'):
-            widget.viewport().update()
+        ready, self._ready_urls = self._ready_urls, set()
+        if widget is None or not hasattr(widget, 'model'):
+            return
+        model = widget.model()
+        for url in ready:
+            for row in self._url_rows.pop(url, ()):
+                index = model.index(row, 0)
+                data = index.data(Qt.UserRole) if index.isValid() else None
+                # Модель могла смениться — проверяем, что строка всё ещё про этот URL
+                if data and url in (data.get('thumbnail'), data.get('avatar_url')):
+                    widget.update(index)
+
+    def on_rows_inserted(self, parent, first: int, last: int):
+        """
+        Слот для rowsInserted модели: вставка в середину (ранжированная
+        выдача) сдвигает строки — иначе _flush_repaints сверил бы URL
+        не с той строкой и пропустил перерисовку.
+        """
+        shift = last - first + 1
+        for url, rows in self._url_rows.items():
+            self._url_rows[url] = {r + shift if r >= first else r for r in rows}
+
+    def thumb_size(self) -> QSize:
+        """Размер превью на карточке (как в paint())."""
+        return QSize(self.CARD_W - 16, self.THUMB_H)
+
+    def set_visible_range(self, first: int, last: int):
+        """
+        Слот для VideoGrid.visible_range_changed: видимые карточки качаются
+        первыми, ряды рядом с экраном — следом, остальное планировщик отменяет.
+        """
+        widget = self.parent()
+        if widget is None or first < 0:
+            self.cache.set_download_window({})
+            return
+        model = widget.model()
+        per_row = widget.items_per_row() if hasattr(widget, 'items_per_row') else 1
+        margin = per_row * self.PREFETCH_ROWS
+        lo = max(0, first - margin)
+        hi = min(model.rowCount() - 1, last + margin)
+
+        # Ушедшие далеко с экрана строки перерисовывать не нужно
+        for url in list(self._url_rows):
+            rows = {r for r in self._url_rows[url] if lo <= r <= hi}
+            if rows:
+                self._url_rows[url] = rows
+            else:
+                del self._url_rows[url]
+
+        wanted: dict[str, int] = {}
+        for row in range(lo, hi + 1):
+            data = model.index(row, 0).data(Qt.UserRole) or {}
+            if first <= row <= last:
+                priority = PRIORITY_VISIBLE
+            else:
+                distance = (first - row) if row < first else (row - last)
+                priority = PRIORITY_PREFETCH + (distance + per_row - 1) // per_row
+            # Аватарки тоже в окне — иначе планировщик снял бы их с очереди
+            for url in (data.get('thumbnail', ''), data.get('avatar_url', '')):
+                if url:
+                    wanted[url] = min(priority, wanted.get(url, priority))
+
+        self.cache.set_download_window(wanted)
+        for url, priority in wanted.items():
+            if priority != PRIORITY_VISIBLE:
+                self.cache.request_download(url, priority)
+
+    def _check_thumb_size(self, size: QSize):
+        """Геометрия карточек поменялась — старые варианты больше не нужны."""
+        if size == self._thumb_size:
+            return
+        if self._thumb_size is not None:
+            self.cache.invalidate_variants(self._thumb_size)
+        self._thumb_size = QSize(size)
 
     # ── Helpers ───────────────────────────────────────────────────────────────
 
@@ -45,6 +138,23 @@ class VideoDelegate(QStyledItemDelegate):
         p.addRoundedRect(QRectF(rect), radius, radius)
         painter.setClipPath(p)
 
+    def _draw_avatar(self, painter, rect, url, row, dpr):
+        """Аватарка канала из кэша; пока её нет — серый круг."""
+        if url:
+            self._url_rows.setdefault(url, set()).add(row)
+        pixmap = self.cache.get_scaled_sync(url, rect.size(), dpr) if url else None
+        if pixmap and not pixmap.isNull():
+            painter.save()
+            p = QPainterPath()
+            p.addEllipse(QRectF(rect))
+            painter.setClipPath(p)
+            painter.drawPixmap(rect.topLeft(), pixmap)
+            painter.restore()
+        else:
+            self._fill_circle(painter, rect, "#272727")
+            if url:
+                self.cache.request_download(url)
+
     # ── Paint ─────────────────────────────────────────────────────────────────
 
     def paint(self, painter: QPainter, option, index):
@@ -68,18 +178,19 @@ class VideoDelegate(QStyledItemDelegate):
             rect.left() + 8, rect.top() + 8,
             rect.width() - 16, self.THUMB_H
         )
+        self._check_thumb_size(thumb_rect.size())
         thumb_url = data.get('thumbnail', '')
-        pixmap = self.cache.get_image_sync(thumb_url) if thumb_url else None
+        if thumb_url:
+            self._url_rows.setdefault(thumb_url, set()).add(index.row())
+        dpr = painter.device().devicePixelRatioF()
+        pixmap = (self.cache.get_scaled_sync(thumb_url, thumb_rect.size(), dpr)
+                  if thumb_url else None)
 
         if pixmap and not pixmap.isNull():
+            # Копия уже нужного размера — просто blit, без масштабирования
             painter.save()
             self._clip_rounded(painter, thumb_rect, self.RADIUS)
-            painter.drawPixmap(
-                thumb_rect,
-                pixmap.scaled(thumb_rect.size(),
-                              Qt.KeepAspectRatioByExpanding,
-                              Qt.SmoothTransformation)
-            )
+            painter.drawPixmap(thumb_rect.topLeft(), pixmap)
             painter.restore()
         else:
             self._fill_rounded(painter, thumb_rect, self.RADIUS, "#272727")
@@ -104,8 +215,14 @@ class VideoDelegate(QStyledItemDelegate):
         info_top = thumb_rect.bottom() + 10
         channel = data.get('channel', '')
 
+        # Аватарка приходит при дозаполнении карточки; место под неё — всегда,
+        # чтобы текст не прыгал
+        avatar_rect = QRect(rect.left() + 8, info_top, self.AVATAR, self.AVATAR)
+        self._draw_avatar(painter, avatar_rect, data.get('avatar_url', ''),
+                          index.row(), dpr)
+
         # ── 3. ЗАГОЛОВОК ──────────────────────────────────────────────────────
-        tx = rect.left() + 8
+        tx = avatar_rect.right() + 11
         tw = rect.right() - tx - 28
         title = data.get('title', 'No Title')
         tf = QFont("Segoe UI", 10, QFont.Bold)
@@ -148,6 +265,10 @@ class VideoDelegate(QStyledItemDelegate):
                 views_str = f"{vs} просмотров"
             except (ValueError, TypeError):
                 views_str = str(views)
+            # Дата загрузки приходит позже, при дозаполнении карточки
+            date = data.get('upload_date', '')
+            if len(date) == 10:
+                views_str += f" • {date[8:10]}.{date[5:7]}.{date[:4]}"
             painter.drawText(QRect(tx, meta_top + 18, tw, 18),
                              Qt.AlignLeft | Qt.AlignVCenter, views_str)
 
@@ -1,17 +1,22 @@
 # ui/titlebar.py
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QStringListModel
 from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QLabel,
-                             QPushButton, QFrame, QLineEdit)
+                             QPushButton, QFrame, QLineEdit, QCompleter)
 from core.constants import MaterialIcon
 from utils.resources import resource_path
 
 TITLEBAR_HEIGHT = 40
+# Пауза в наборе, после которой запускается поиск, и минимальная длина запроса
+TYPE_DEBOUNCE_MS = 450
+TYPE_MIN_CHARS = 3
 
 
 class CustomTitleBar(QWidget):
     sidebar_toggle = pyqtSignal()
-    search_requested = pyqtSignal(str)   # текст поиска
+    search_requested = pyqtSignal(str)   # текст поиска (Enter, кнопка, подсказка)
+    search_typed = pyqtSignal(str)       # пользователь перестал печатать
+    query_edited = pyqtSignal(str)       # каждое изменение — для подсказок
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -52,6 +57,21 @@ class CustomTitleBar(QWidget):
         self.search_input.setMinimumWidth(200)
         self.search_input.setMaximumWidth(600)
         self.search_input.returnPressed.connect(self._on_search)
+        self.search_input.textEdited.connect(self._on_text_edited)
+
+        # Поиск по мере набора: срабатывает после паузы в TYPE_DEBOUNCE_MS
+        self._type_timer = QTimer(self)
+        self._type_timer.setSingleShot(True)
+        self._type_timer.setInterval(TYPE_DEBOUNCE_MS)
+        self._type_timer.timeout.connect(self._on_type_pause)
+
+        # Подсказки: история и закэшированные запросы, список задаёт MainWindow
+        self._suggestions = QStringListModel(self)
+        self.completer = QCompleter(self._suggestions, self)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.setCompletionMode(QCompleter.PopupCompletion)
+        self.completer.activated[str].connect(self._on_suggestion)
+        self.search_input.setCompleter(self.completer)
         # Запрещаем перетаскивание окна при клике на поиск
         self.search_input.mousePressEvent = self._search_click
 
@@ -132,10 +152,27 @@ class CustomTitleBar(QWidget):
         QLineEdit.mousePressEvent(self.search_input, event)
 
     def _on_search(self):
+        self._type_timer.stop()
         text = self.search_input.text().strip()
         if text:
             self.search_requested.emit(text)
 
+    def _on_text_edited(self, text: str):
+        self.query_edited.emit(text)
+        self._type_timer.start()
+
+    def _on_type_pause(self):
+        text = self.search_input.text().strip()
+        if len(text) >= TYPE_MIN_CHARS:
+            self.search_typed.emit(text)
+
+    def _on_suggestion(self, text: str):
+        self._type_timer.stop()
+        self.search_requested.emit(text)
+
+    def set_suggestions(self, items: list[str]):
+        self._suggestions.setStringList(items)
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         # Линия всегда в самом низу на всю ширину
@@ -0,0 +1,113 @@
+# ui/video_grid.py
+"""
+Сетка карточек видео.
+
+Обычный QListWidget в IconMode, который дополнительно сообщает,
+какие строки сейчас на экране: visible_range_changed(first, last).
+Диапазон пересчитывается не чаще раза за тик цикла событий — после
+прокрутки, ресайза и изменения модели. Когда видны последние ряды,
+дополнительно испускается near_end() — сигнал подгрузить следующую страницу.
+"""
+from PyQt5.QtWidgets import QListWidget
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+
+class VideoGrid(QListWidget):
+    visible_range_changed = pyqtSignal(int, int)   # first, last (включительно)
+    near_end = pyqtSignal()                        # видны последние ряды
+
+    # За сколько рядов до конца просить следующую страницу
+    NEAR_END_ROWS = 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._visible = (-1, -1)
+
+        self._range_timer = QTimer(self)
+        self._range_timer.setSingleShot(True)
+        self._range_timer.setInterval(0)
+        self._range_timer.timeout.connect(self._emit_visible_range)
+
+        self.verticalScrollBar().valueChanged.connect(self._schedule_range_update)
+        self.model().rowsInserted.connect(self._on_model_changed)
+        self.model().rowsRemoved.connect(self._on_model_changed)
+        self.model().modelReset.connect(self._on_model_changed)
+
+    # ── Видимый диапазон ──────────────────────────────────────────────────────
+
+    def visible_range(self) -> tuple[int, int]:
+        """
+        Первая и последняя строки, пересекающие viewport, или (-1, -1).
+        Карточки идут слева направо, сверху вниз — поэтому бинарный поиск.
+        """
+        count = self.count()
+        if count == 0:
+            return -1, -1
+        self.executeDelayedItemsLayout()   # иначе visualRect может быть устаревшим
+        height = self.viewport().height()
+
+        def bottom(row):
+            return self.visualRect(self.model().index(row, 0)).bottom()
+
+        def top(row):
+            return self.visualRect(self.model().index(row, 0)).top()
+
+        lo, hi = 0, count - 1
+        while lo < hi:                     # первая строка с bottom >= 0
+            mid = (lo + hi) // 2
+            if bottom(mid) < 0:
+                lo = mid + 1
+            else:
+                hi = mid
+        first = lo
+
+        lo, hi = first, count - 1
+        while lo < hi:                     # последняя строка с top < height
+            mid = (lo + hi + 1) // 2
+            if top(mid) < height:
+                lo = mid
+            else:
+                hi = mid - 1
+        return first, lo
+
+    def items_per_row(self) -> int:
+        """Сколько карточек помещается в ряд при текущей ширине."""
+        count = self.count()
+        if count == 0:
+            return 1
+        first_top = self.visualRect(self.model().index(0, 0)).top()
+        n = 1
+        while n < count and self.visualRect(self.model().index(n, 0)).top() == first_top:
+            n += 1
+        return n
+
+    def refresh_visible_range(self):
+        """Пересчитать диапазон (и near_end) на следующем тике."""
+        self._schedule_range_update()
+
+    def _schedule_range_update(self, *args):
+        self._range_timer.start()
+
+    def _on_model_changed(self, *args):
+        # Те же строки могут теперь содержать другие видео — сообщаем в любом случае
+        self._visible = (-1, -1)
+        self._schedule_range_update()
+
+    def _emit_visible_range(self):
+        rng = self.visible_range()
+        if rng != self._visible:
+            self._visible = rng
+            self.visible_range_changed.emit(*rng)
+        last = rng[1]
+        if last >= 0 and last >= self.count() - self.NEAR_END_ROWS * self.items_per_row():
+            self.near_end.emit()
+
+    # ── События ───────────────────────────────────────────────────────────────
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_range_update()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_range_update()
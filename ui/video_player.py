@@ -8,7 +8,7 @@ import traceback
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLabel, QFrame, QScrollArea, QSizePolicy, QSlider, QMenu, QAction)
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QEvent, QRectF, QPropertyAnimation, QEasingCurve, QParallelAnimationGroup
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QEvent, QRectF, QSize, QPropertyAnimation, QEasingCurve, QParallelAnimationGroup
 from PyQt5.QtGui import QFont, QPixmap, QImage, QPainterPath, QRegion
 from PyQt5.QtWidgets import QGraphicsOpacityEffect
 
@@ -40,10 +40,12 @@ class AVWorker(QThread):
     duration_found = pyqtSignal(float)
     time_update    = pyqtSignal(float)
     error_signal   = pyqtSignal(str)
+    stream_expired = pyqtSignal()   # сервер ответил 403 — ссылка протухла
 
-    def __init__(self, url, start_time=0):
+    def __init__(self, url, start_time=0, info=None):
         super().__init__()
         self.url        = url
+        self.info       = info or {}   # метаданные формата из кэша ссылок
         self.start_time = float(start_time)
         self.width      = 0
         self.height     = 0
@@ -88,7 +90,7 @@ class AVWorker(QThread):
 
         si = self._si()
         video_cmd = [
-            'ffmpeg', '-ss', str(self.start_time),
+            'ffmpeg', '-nostats', '-loglevel', 'error', '-ss', str(self.start_time),
             '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
             '-i', direct_url, '-an',
             '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'
@@ -102,7 +104,7 @@ class AVWorker(QThread):
 
         try:
             self.video_proc = subprocess.Popen(
-                video_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                video_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                 bufsize=self.width * self.height * 3 * 4, startupinfo=si)
         except Exception:
             _log("worker", "video ffmpeg failed\n" + traceback.format_exc())
@@ -119,7 +121,8 @@ class AVWorker(QThread):
 
         vt = threading.Thread(target=self._read_video, daemon=True)
         at = threading.Thread(target=self._play_audio, daemon=True)
-        vt.start(); at.start()
+        et = threading.Thread(target=self._watch_errors, daemon=True)
+        vt.start(); at.start(); et.start()
         self._render_loop()
         at.join(timeout=3); vt.join(timeout=2)
 
@@ -138,6 +141,13 @@ class AVWorker(QThread):
     def _resolve_url(self):
         # Если URL уже прямой — берём размер из ffprobe, yt-dlp не нужен
         if self._is_direct_url(self.url):
+            info = self.info
+            if info.get("width") and info.get("height"):
+                # Формат уже известен из yt-dlp — ffprobe не нужен
+                _log("resolve", "direct URL with known format, skipping ffprobe")
+                return (self.url, float(info.get("duration") or 0),
+                        float(info.get("fps") or 30),
+                        int(info["width"]), int(info["height"]))
             _log("resolve", "direct URL detected, skipping yt-dlp")
             w, h, fps, dur = self._probe_stream(self.url)
             return self.url, dur, fps, w, h
@@ -212,6 +222,22 @@ class AVWorker(QThread):
         except Exception:
             _log("video_reader", traceback.format_exc())
 
+    def _watch_errors(self):
+        """Читает stderr видео-ffmpeg (только ошибки) и ловит 403."""
+        try:
+            for raw in self.video_proc.stderr:
+                line = raw.decode(errors="replace").strip()
+                if not line:
+                    continue
+                _log("ffmpeg", line)
+                # «HTTP error 403 Forbidden» / «Server returned 403 Forbidden»;
+                # просто «403» бывает и в смещениях, и во временных метках
+                if "403 Forbidden" in line and self.running:
+                    self.stream_expired.emit()
+                    return
+        except Exception:
+            pass
+
     def set_volume(self, vol: float):
         """Установить громкость 0.0-1.0"""
         with self._volume_lock:
@@ -308,6 +334,7 @@ class AVWorker(QThread):
 
 class EmbeddedVideoWidget(QWidget):
     ar_changed = pyqtSignal(float)   # испускается когда получен реальный AR видео
+    stream_expired = pyqtSignal()    # ссылка на поток вернула 403
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -323,6 +350,7 @@ class EmbeddedVideoWidget(QWidget):
         self._current_sec = 0.0
         self._is_playing  = False
         self._url         = ""
+        self._stream_info: dict = {}
         self._video_ar    = 16 / 9   # aspect ratio, обновится из первого кадра
         self._ar_set      = False
         self._volume      = 1.0      # громкость 0.0-1.0
@@ -741,9 +769,10 @@ class EmbeddedVideoWidget(QWidget):
 
     # ── Плеер ──────────────────────────────────────────────────────
 
-    def play(self, url: str):
+    def play(self, url: str, info: dict | None = None, start_time: float = 0):
         self._url = url
-        self._start_worker(url, 0)
+        self._stream_info = info or {}
+        self._start_worker(url, start_time)
 
     def stop(self):
         self._stop_worker()
@@ -759,6 +788,7 @@ class EmbeddedVideoWidget(QWidget):
                 self.worker.duration_found.disconnect()
                 self.worker.time_update.disconnect()
                 self.worker.error_signal.disconnect()
+                self.worker.stream_expired.disconnect()
             except Exception:
                 pass
             self.worker.stop()
@@ -772,12 +802,13 @@ class EmbeddedVideoWidget(QWidget):
         self._ar_set      = False   # сбрасываем AR — будет получен из нового потока
         self._stop_worker()
 
-        self.worker = AVWorker(url, start_time)
+        self.worker = AVWorker(url, start_time, self._stream_info)
         self.worker.set_volume(self._volume)  # применяем текущую громкость
         self.worker.frame_ready.connect(self._on_frame)
         self.worker.duration_found.connect(self._on_duration)
         self.worker.time_update.connect(self._on_time)
         self.worker.error_signal.connect(lambda m: _log("ERROR", m))
+        self.worker.stream_expired.connect(self.stream_expired)
         self.worker.start()
 
         self._is_playing = True
@@ -908,9 +939,13 @@ class EmbeddedVideoWidget(QWidget):
 # ════════════════════════════════════════════════════════════════════
 
 class RelatedVideoItem(QWidget):
-    def __init__(self, data: dict, parent=None):
+    THUMB_SIZE = QSize(168, 94)
+
+    def __init__(self, data: dict, cache_manager=None, parent=None):
         super().__init__(parent)
         self.data = data
+        self.cache = cache_manager
+        self.thumb_url = data.get('thumbnail', '')
         self.setFixedHeight(94)
         self.setCursor(Qt.PointingHandCursor)
         self.setAttribute(Qt.WA_Hover, True)
@@ -921,7 +956,7 @@ class RelatedVideoItem(QWidget):
         layout.setSpacing(8)
 
         self.thumb_label = QLabel()
-        self.thumb_label.setFixedSize(168, 94)
+        self.thumb_label.setFixedSize(self.THUMB_SIZE)
         self.thumb_label.setStyleSheet("background-color: #272727; border-radius: 6px;")
         self.thumb_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.thumb_label)
@@ -951,11 +986,26 @@ class RelatedVideoItem(QWidget):
         text_layout.addStretch()
         layout.addWidget(text_widget, stretch=1)
 
+        self.refresh_thumbnail()
+
+    def refresh_thumbnail(self):
+        """Берёт готовую копию 168x94 из кэша или ставит загрузку."""
+        if not self.cache or not self.thumb_url:
+            return
+        px = self.cache.get_scaled_sync(self.thumb_url, self.THUMB_SIZE,
+                                        self.devicePixelRatioF())
+        if px is not None:
+            self.thumb_label.setPixmap(px)
+        else:
+            # Закреплено: пересчёт окна сетки за плеером не должен её отменить
+            self.cache.request_download(self.thumb_url, pinned=True)
+
     def set_thumbnail(self, pixmap: QPixmap):
         if pixmap and not pixmap.isNull():
-            scaled = pixmap.scaled(168, 94, Qt.KeepAspectRatioByExpanding,
-                                   Qt.SmoothTransformation)
-            self.thumb_label.setPixmap(scaled)
+            if pixmap.size() / pixmap.devicePixelRatio() != self.THUMB_SIZE:
+                pixmap = pixmap.scaled(self.THUMB_SIZE, Qt.KeepAspectRatioByExpanding,
+                                       Qt.SmoothTransformation)
+            self.thumb_label.setPixmap(pixmap)
 
     def enterEvent(self, e):
         self.setStyleSheet("background: #1f1f1f; border-radius: 8px;")
@@ -971,12 +1021,18 @@ class RelatedVideoItem(QWidget):
 # ════════════════════════════════════════════════════════════════════
 
 class NativePlayer(QWidget):
-    def __init__(self, parent=None):
+    stream_expired = pyqtSignal()   # текущая ссылка на поток отозвана (403)
+
+    def __init__(self, cache_manager=None, parent=None):
         super().__init__(parent)
         self.setStyleSheet("background-color: #0f0f0f;")
 
+        self.cache = cache_manager
         self._current_data: dict = {}
         self._related_items: list = []
+        self._related_cards: list[RelatedVideoItem] = []
+        if self.cache:
+            self.cache.image_ready.connect(self._on_image_ready)
 
         root = QHBoxLayout(self)
         root.setContentsMargins(24, 16, 0, 0)
@@ -1009,6 +1065,7 @@ class NativePlayer(QWidget):
         # Видеоплеер — высота вычисляется динамически по AR и ширине левой колонки
         self.video_widget = EmbeddedVideoWidget()
         self.video_widget.ar_changed.connect(self._update_video_height)
+        self.video_widget.stream_expired.connect(self.stream_expired)
         left_layout.addWidget(self.video_widget)  # без stretch
 
         # Инфо под видео
@@ -1151,14 +1208,26 @@ class NativePlayer(QWidget):
             if item.widget():
                 item.widget().deleteLater()
         self._related_items = items
+        self._related_cards = []
         for data in items[:20]:
-            card = RelatedVideoItem(data)
+            card = RelatedVideoItem(data, self.cache)
+            self._related_cards.append(card)
             self.related_list_layout.insertWidget(
                 self.related_list_layout.count() - 1, card)
 
-    def play_raw_url(self, url: str):
-        """Запустить воспроизведение по прямой ссылке на поток."""
-        self.video_widget.play(url)
+    def _on_image_ready(self, url: str):
+        for card in self._related_cards:
+            if card.thumb_url == url:
+                card.refresh_thumbnail()
+
+    def play_raw_url(self, url: str, info: dict | None = None, resume: bool = False):
+        """
+        Запустить воспроизведение по прямой ссылке на поток.
+        info — метаданные формата (без них размер узнаёт ffprobe);
+        resume — продолжить с текущей позиции (ссылку заменили на свежую).
+        """
+        start = self.video_widget._current_sec if resume else 0
+        self.video_widget.play(url, info, start)
 
     def stop(self):
         """Остановить воспроизведение."""